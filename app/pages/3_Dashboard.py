@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+import plotly.graph_objects as go
 from components.bc_assistant import render_bc_assistant   # ✅ ADDED
+from utils.dashboard import UTILIZATION_AXIS, VOLATILITY_AXIS, dashboard_score, whatif_surface
 
 
 def render_ai_credit_dashboard_page():
@@ -218,106 +219,33 @@ def render_ai_credit_dashboard_page():
             )
 
         # ----- SIMPLE "AI" SCORING LOGIC (for demo only) -----
-        base_score = 650
-
-        # Income effect
-        if monthly_income < 800:
-            base_income_impact = "Negative"
-            base_score -= 80
-        elif monthly_income < 1500:
-            base_income_impact = "Slight negative"
-            base_score -= 40
-        elif monthly_income > 5000:
-            base_income_impact = "Strong positive"
-            base_score += 50
-        elif monthly_income > 3500:
-            base_income_impact = "Positive"
-            base_score += 30
-        else:
-            base_income_impact = "Neutral"
-
-        # Volatility (higher volatility = lower score)
-        base_score -= (income_volatility * 0.6)
-        if income_volatility <= 20:
-            vol_impact = "Positive"
-        elif income_volatility <= 50:
-            vol_impact = "Moderate"
-        else:
-            vol_impact = "Negative"
-
-        # Utilization (sweet spot around 20–40%)
-        if utilization < 10:
-            util_impact = "Slight negative (under-used)"
-            base_score -= 10
-        elif 10 <= utilization <= 40:
-            util_impact = "Positive"
-            base_score += 20
-        elif utilization > 80:
-            util_impact = "Negative (high utilization)"
-            base_score -= 40
-        else:
-            util_impact = "Neutral"
-
-        # Missed payments
-        if missed_payments == 0:
-            pay_impact = "Positive (clean record)"
-        elif missed_payments <= 2:
-            pay_impact = "Negative"
-        else:
-            pay_impact = "Strong negative"
-        base_score -= missed_payments * 25
-
-        # Country risk
-        if country_risk == "Low":
-            crisk_impact = "Positive"
-            base_score += 20
-        elif country_risk == "Medium":
-            crisk_impact = "Neutral"
-        else:
-            crisk_impact = "Negative"
-            base_score -= 30
-
-        # Data depth (months of history + accounts)
-        depth_boost = min(months_history, 24) * 0.8
-        accounts_boost = min(accounts_linked, 5) * 4
-        base_score += depth_boost
-        base_score += accounts_boost
-
-        if months_history < 6:
-            depth_impact = "Thin file (limited history)"
-        elif months_history < 12:
-            depth_impact = "Developing history"
-        else:
-            depth_impact = "Good history depth"
-
-        # KYC bonus
-        if kyc_status == "Verified":
-            kyc_impact = "Positive"
-            base_score += 20
-        elif kyc_status == "In review":
-            kyc_impact = "Mild positive"
-            base_score += 5
-        else:
-            kyc_impact = "Negative (unverified)"
-
-        # Clamp
-        ai_score = int(np.clip(base_score, 300, 900))
+        # Points and impact labels come from config/scoring_rules.json ("dashboard_score")
+        profile = dict(
+            monthly_income=monthly_income,
+            income_volatility=income_volatility,
+            utilization=utilization,
+            missed_payments=missed_payments,
+            country_risk=country_risk,
+            months_history=months_history,
+            accounts_linked=accounts_linked,
+            kyc_status=kyc_status,
+        )
+        scored = dashboard_score(profile)
+        base_income_impact = scored["income"]
+        vol_impact = scored["volatility_impact"]
+        util_impact = scored["utilization"]
+        pay_impact = scored["missed_payments_impact"]
+        crisk_impact = scored["country_risk"]
+        depth_impact = scored["depth_impact"]
+        kyc_impact = scored["kyc"]
+        ai_score = scored["score"]
+        risk_level = scored["band"]
 
         # Risk bucket
-        if ai_score >= 760:
-            risk_level = "Low"
-            badge_class = "bc-badge-low"
-        elif ai_score >= 620:
-            risk_level = "Medium"
-            badge_class = "bc-badge-medium"
-        else:
-            risk_level = "High"
-            badge_class = "bc-badge-high"
+        badge_class = {"Low": "bc-badge-low", "Medium": "bc-badge-medium", "High": "bc-badge-high"}[risk_level]
 
         # Recommended limit (simple function of income and score)
-        limit_base = monthly_income * 1.5
-        limit_multiplier = (ai_score - 300) / 600  # 0–1 range
-        recommended_limit = int(limit_base * limit_multiplier)
+        recommended_limit = scored["limit"]
 
         # ---------- DECISION EXPLANATION TABLE ----------
         explanation_rows = [
@@ -475,15 +403,10 @@ def render_ai_credit_dashboard_page():
                 key="improved_missed"
             )
 
-            # Re-score quickly with improved behavior (approximate)
-            improved_score = ai_score
-            improved_score += (income_volatility - improved_vol) * 0.6
-            if utilization > 40 and improved_util <= 40:
-                improved_score += 25
-            improved_score += (missed_payments - improved_missed) * 25
-
-            improved_score = int(np.clip(improved_score, 300, 900))
-            improved_limit = int(limit_base * ((improved_score - 300) / 600))
+            # Re-score with the same rules as above: a lookup into the profile's precomputed grid
+            surface = whatif_surface(profile)
+            improved_score = int(surface["score"][improved_util, improved_vol, improved_missed])
+            improved_limit = int(surface["limit"][improved_util, improved_vol, improved_missed])
 
             st.write(f"**AI Score (what-if):** {improved_score} / 900")
             st.write(f"**Suggested limit (what-if):** ${improved_limit:,.0f}")
@@ -498,6 +421,20 @@ def render_ai_credit_dashboard_page():
             else:
                 st.info("No change in score.")
 
+        with st.expander("Sensitivity heatmap (utilization × volatility)"):
+            st.caption(f"BC AI Score across target utilization and volatility, at {improved_missed} missed payments.")
+            heatmap = go.Figure(
+                go.Heatmap(
+                    z=surface["score"][:, :, improved_missed],
+                    x=VOLATILITY_AXIS,
+                    y=UTILIZATION_AXIS,
+                    colorscale="Teal",
+                    colorbar={"title": "Score"},
+                )
+            )
+            heatmap.update_layout(xaxis_title="Income volatility", yaxis_title="Utilization (%)", height=420)
+            st.plotly_chart(heatmap, use_container_width=True)
+
         st.markdown("</div>", unsafe_allow_html=True)
 
 
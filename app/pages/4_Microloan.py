@@ -1,7 +1,7 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
 from components.bc_assistant import render_bc_assistant   # ✅ ADDED
+from utils.loans import FREQUENCIES, build_schedules, loan_ledger, offer_matrix, schedule_frame
+from utils.rules import get_plan
 
 
 def render_microloan_page():
@@ -148,6 +148,11 @@ def render_microloan_page():
                 ["Weekly", "Bi-Weekly", "Monthly"]
             )
 
+            interest_method = st.selectbox(
+                "Interest method",
+                ["Simple interest", "Declining balance"]
+            )
+
             purpose = st.selectbox(
                 "Loan purpose",
                 ["Education", "Living expenses", "Travel", "Emergencies", "Other"]
@@ -174,93 +179,42 @@ def render_microloan_page():
     st.write("")
 
     # ================== STEP 3: AI LOAN DECISION ==================
-    approval_score_cutoff = 630
-    auto_approval_cutoff = 720
-
-    # Risk penalty based on volatility
-    volatility_penalty = volatility * 0.4
-
-    # Final score used for decision
-    final_score = ai_score - volatility_penalty
-
-    if final_score >= auto_approval_cutoff:
-        decision = "Approved"
-        badge_class = "bc-badge-approved"
-    elif final_score >= approval_score_cutoff:
-        decision = "Needs manual review"
-        badge_class = "bc-badge-manual"
-    else:
-        decision = "Declined"
-        badge_class = "bc-badge-denied"
+    # Cutoffs, APR and max-offer formulas live in config/scoring_rules.json
+    decision_result = get_plan("microloan_decision").evaluate_one(ai_score=ai_score, volatility=volatility)
+
+    # Final score used for decision (AI score minus volatility penalty)
+    final_score = decision_result["score"]
+    decision = decision_result["band"]
+    badge_class = {
+        "Approved": "bc-badge-approved",
+        "Needs manual review": "bc-badge-manual",
+        "Declined": "bc-badge-denied",
+    }[decision]
 
     # APR calculation (simple risk-adjusted)
-    base_apr = 9.5
-    risk_adj = (700 - ai_score) / 20
-    volatility_adj = volatility / 15
-    apr = max(5.9, base_apr + risk_adj + volatility_adj)
+    apr = get_plan("microloan_apr").evaluate_one(ai_score=ai_score, volatility=volatility)["score"]
 
     # Max amount offered
-    max_offer = int((final_score - 300) / 600 * 600)
-    max_offer = int(np.clip(max_offer, 30, 600))
+    max_offer = get_plan("microloan_max_offer").evaluate_one(final_score=final_score)["score"]
 
     # Align offer with user request
     approved_amount = max(0, min(request_amount, max_offer))
 
-    # ---------- INTEREST + REPAYMENT CALC ----------
-    if approved_amount > 0 and decision != "Declined":
-        term_years = duration_weeks / 52
-        simple_interest = approved_amount * (apr / 100) * term_years
-        total_repay = approved_amount + simple_interest
-    else:
-        term_years = 0
-        simple_interest = 0
-        total_repay = 0
-
-    # Number of payments based on frequency
-    if repayment_frequency == "Weekly":
-        num_payments = duration_weeks
-        period_label = "Week"
-    elif repayment_frequency == "Bi-Weekly":
-        num_payments = max(1, duration_weeks // 2)
-        period_label = "Bi-week"
-    else:  # Monthly
-        num_payments = max(1, round(duration_weeks / 4))
-        period_label = "Month"
-
-    num_payments = int(max(1, num_payments))
-
-    if approved_amount > 0 and decision != "Declined":
-        payment_per = total_repay / num_payments
-        principal_per = approved_amount / num_payments
-        interest_per = simple_interest / num_payments
-    else:
-        payment_per = principal_per = interest_per = 0
-
-    # Build repayment schedule
-    schedule_rows = []
-    remaining = approved_amount
-
-    for i in range(1, num_payments + 1):
-        if remaining <= 0:
-            principal_i = 0
-        else:
-            principal_i = min(principal_per, remaining)
-        interest_i = interest_per
-        total_i = principal_i + interest_i
-        remaining = max(0, remaining - principal_i)
-
-        schedule_rows.append(
-            {
-                "#": i,
-                "Period": f"{period_label} {i}",
-                "Principal": round(principal_i, 2),
-                "Interest": round(interest_i, 2),
-                "Total payment": round(total_i, 2),
-                "Remaining balance": round(remaining, 2),
-            }
-        )
-
-    schedule_df = pd.DataFrame(schedule_rows)
+    # ---------- INTEREST + REPAYMENT SCHEDULE ----------
+    loan_approved = approved_amount > 0 and decision != "Declined"
+    schedules_method = "declining" if interest_method == "Declining balance" else "simple"
+    schedules = build_schedules(
+        approved_amount if loan_approved else 0,
+        apr,
+        duration_weeks,
+        repayment_frequency,
+        method=schedules_method,
+    )
+    period_label = FREQUENCIES[repayment_frequency][1]
+    interest_cost = float(schedules["total_interest"][0])
+    total_repay = float(schedules["total_repay"][0])
+    payment_per = float(schedules["payment_per"][0])
+    schedule_df = schedule_frame(schedules, period_label)
 
     # ================== OFFER CARD ==================
     with st.container():
@@ -295,6 +249,23 @@ def render_microloan_page():
 
     st.write("")
 
+    # ================== OFFER MATRIX ==================
+    with st.expander("Compare all durations and frequencies"):
+        matrix = offer_matrix(ai_score, volatility, method=schedules_method)
+        at_amount = matrix[matrix["Amount requested"] == request_amount]
+        st.caption(
+            f"Payment per period for ${request_amount} at {apr:.2f}% APR "
+            f"(approved up to ${max_offer}, decision: {decision})."
+        )
+        st.dataframe(
+            at_amount.pivot(index="Duration (weeks)", columns="Frequency", values="Payment per period")[
+                list(FREQUENCIES)
+            ].round(2),
+            use_container_width=True,
+        )
+
+    st.write("")
+
     # ================== STEP 4: INTEREST BREAKDOWN + SCHEDULE ==================
     with st.container():
         st.markdown('<div class="bc-card-box">', unsafe_allow_html=True)
@@ -307,7 +278,7 @@ def render_microloan_page():
             with colX:
                 st.metric("Principal", f"${approved_amount:,.2f}")
             with colY:
-                st.metric("Interest cost over term", f"${simple_interest:,.2f}")
+                st.metric("Interest cost over term", f"${interest_cost:,.2f}")
             with colZ:
                 st.metric("Total to repay", f"${total_repay:,.2f}")
 
@@ -363,6 +334,10 @@ def render_microloan_page():
 
             if accept_clicked:
                 st.session_state["loan_accepted"] = True
+                # Record the loan in the shared ledger used for cash-flow projections
+                st.session_state["accepted_loan_id"] = loan_ledger.add(
+                    approved_amount, apr, duration_weeks, repayment_frequency, method=schedules_method
+                )
 
             if st.session_state["loan_accepted"]:
                 st.success("✅ Loan accepted successfully.")
@@ -1,76 +1,143 @@
+import os
+import tempfile
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 from components.bc_assistant import render_bc_assistant   # ✅ ADDED
+from utils.borrower_db import SqliteBorrowerStore
+from utils.borrowers import RISK_BANDS, BorrowerOverlay, BorrowerStore, demo_borrowers
+from utils.export import EXPORT_FORMATS, ExportFile
+from utils.loans import loan_ledger
+
+
+BORROWER_DB_PATH = os.environ.get("BC_BORROWER_DB", os.path.join(tempfile.gettempdir(), "bc_borrowers.db"))
+
+
+@st.cache_resource
+def get_borrower_store():
+    """One SQLite borrower store per server process, shared by every lender session."""
+    return SqliteBorrowerStore(BORROWER_DB_PATH, seed=demo_borrowers())
+
+
+@st.cache_resource(max_entries=1)
+def get_borrower_snapshot(version):
+    """Read-only in-memory copy of the shared book at `version`, shared by every sandbox session."""
+    snapshot = BorrowerStore(pd.concat(get_borrower_store().iter_frames(), ignore_index=True))
+    snapshot.version = version
+    return snapshot
 
 
-def init_borrowers_state():
-    """Initialize borrowers in session_state if not already set."""
-    if "borrowers" not in st.session_state:
-        borrowers = pd.DataFrame(
-            [
-                {
-                    "ID": 1,
-                    "Name": "John Rivera",
-                    "Country": "Philippines",
-                    "Requested": 150,
-                    "AI Score": 712,
-                    "Volatility": 27,
-                    "Flags": "Low volatility, Clean history",
-                    "Status": "In review",
-                    "Wallet balance": 45,
-                    "Bank balance": 320,
-                },
-                {
-                    "ID": 2,
-                    "Name": "Lina Chen",
-                    "Country": "Malaysia",
-                    "Requested": 80,
-                    "AI Score": 640,
-                    "Volatility": 48,
-                    "Flags": "Medium volatility",
-                    "Status": "In review",
-                    "Wallet balance": 120,
-                    "Bank balance": 510,
-                },
-                {
-                    "ID": 3,
-                    "Name": "Samuel Okoro",
-                    "Country": "Kenya",
-                    "Requested": 220,
-                    "AI Score": 560,
-                    "Volatility": 72,
-                    "Flags": "High volatility, Thin file",
-                    "Status": "In review",
-                    "Wallet balance": 30,
-                    "Bank balance": 190,
-                },
-                {
-                    "ID": 4,
-                    "Name": "Maria Gomez",
-                    "Country": "Colombia",
-                    "Requested": 300,
-                    "AI Score": 785,
-                    "Volatility": 18,
-                    "Flags": "Strong stability",
-                    "Status": "Approved",
-                    "Wallet balance": 260,
-                    "Bank balance": 1100,
-                },
-            ]
+def get_sandbox_overlay(shared):
+    """This session's what-if overlay, pinned to its snapshot until commit, discard or refresh.
+
+    Writes to the shared book don't rebuild anything; a session moves to the latest
+    snapshot only through refresh_sandbox().
+    """
+    overlay = st.session_state.get("lender_overlay")
+    if overlay is None:
+        overlay = st.session_state["lender_overlay"] = BorrowerOverlay(get_borrower_snapshot(shared.version))
+    return overlay
+
+
+def refresh_sandbox(shared):
+    """Move this session's overlay onto the latest snapshot, keeping its edits."""
+    overlay = get_sandbox_overlay(shared)
+    if overlay.base.version != shared.version:
+        overlay.rebase(get_borrower_snapshot(shared.version))
+
+
+# Sandbox buttons act through callbacks, so their effect is in place before the page renders.
+def commit_sandbox(shared):
+    conflicts = get_sandbox_overlay(shared).commit(shared)
+    if conflicts:
+        st.session_state["lender_sandbox_notice"] = (
+            "warning",
+            f"Nothing committed: {len(conflicts)} application(s) were decided by another lender "
+            "since your snapshot. Discard or review those edits and try again.",
         )
+    else:
+        refresh_sandbox(shared)
+        st.session_state["lender_sandbox_notice"] = ("success", "Sandbox edits committed to the shared book.")
+
+
+def discard_sandbox(shared):
+    get_sandbox_overlay(shared).discard()
+    refresh_sandbox(shared)
+
+
+def render_sandbox_bar(bar, overlay, shared):
+    """Fill the sandbox bar; called once this run's decisions are applied so the counts are current."""
+    with bar:
+        col_info, col_refresh, col_commit, col_discard = st.columns([3, 1, 1, 1])
+        with col_refresh:
+            st.button(
+                "Refresh snapshot",
+                on_click=refresh_sandbox,
+                args=(shared,),
+                disabled=overlay.base.version == shared.version,
+                help="Load decisions other lenders made since your snapshot, keeping your edits.",
+            )
+        with col_commit:
+            st.button("Commit edits", on_click=commit_sandbox, args=(shared,), disabled=overlay.pending == 0)
+        with col_discard:
+            st.button("Discard edits", on_click=discard_sandbox, args=(shared,), disabled=overlay.pending == 0)
+        with col_info:
+            st.info(f"Sandbox mode · {overlay.pending} applicant(s) edited in this session.")
 
-        # Derive a simple risk band from AI score
-        def risk_band(score):
-            if score >= 760:
-                return "Low"
-            elif score >= 620:
-                return "Medium"
-            else:
-                return "High"
+        notice = st.session_state.pop("lender_sandbox_notice", None)
+        if notice is not None:
+            getattr(st, notice[0])(notice[1])
+
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+
+def paged_table(store, positions, columns, key, default_sort="ID"):
+    """Show one sorted page of `positions` from the store and return that page.
+
+    Only the requested page is materialized and sent to the browser; the sort
+    column, direction and page number live in session_state so the cursor stays
+    put across reruns.
+    """
+    total = len(positions)
+    sort_cols = ["ID"] + [c for c in columns if c != "ID"]
+
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+    with c1:
+        sort_by = st.selectbox("Sort by", sort_cols, index=sort_cols.index(default_sort), key=f"{key}_sort")
+    with c2:
+        descending = st.toggle("Descending", key=f"{key}_desc")
+    with c3:
+        size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_size")
+
+    pages = max(1, -(-total // size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with c4:
+        number = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    page = store.page(positions, int(number) - 1, size, sort_by, descending, columns)
+    first = (int(number) - 1) * size
+    st.caption(f"Showing {first + 1 if total else 0:,}–{first + len(page):,} of {total:,}")
+    st.dataframe(page, use_container_width=True, hide_index=True)
+    return page
+
+
+EXPORT_LABELS = {"csv.gz": "CSV (gzip)", "parquet": "Parquet"}
+
+
+def prepare_export(store, positions, fmt, key):
+    """Stream the given rows to a temp file in chunks, replacing this session's previous export.
+
+    The file is removed with the session (see ExportFile) or when the next export replaces it.
+    """
+    previous = st.session_state.pop("borrower_export", None)
+    if previous is not None:
+        previous["file"].remove()
 
-        borrowers["Risk band"] = borrowers["AI Score"].apply(risk_band)
-        st.session_state["borrowers"] = borrowers
+    st.session_state["borrower_export"] = {"key": key, "file": ExportFile(store.iter_frames(positions), fmt)}
+    return st.session_state["borrower_export"]
 
 
 def get_transaction_history(name: str) -> pd.DataFrame:
@@ -115,8 +182,7 @@ def get_transaction_history(name: str) -> pd.DataFrame:
 
 def render_lender_portal():
 
-    init_borrowers_state()
-    borrowers = st.session_state["borrowers"]
+    shared = get_borrower_store()
 
     # ---------- PAGE STYLE ----------
     st.markdown(
@@ -193,6 +259,15 @@ def render_lender_portal():
 
     st.markdown("---")
 
+    # ================== WHAT-IF SANDBOX ==================
+    sandbox = st.toggle(
+        "What-if sandbox",
+        help="Decisions stay private to this session until you commit them to the shared book.",
+    )
+    # The bar is drawn last (render_sandbox_bar) so it reflects this run's decisions.
+    sandbox_bar = st.container()
+    store = get_sandbox_overlay(shared) if sandbox else shared
+
     # ================== PORTFOLIO OVERVIEW ==================
     with st.container():
         st.markdown('<div class="bc-card-box">', unsafe_allow_html=True)
@@ -201,83 +276,153 @@ def render_lender_portal():
         colA, colB, colC, colD = st.columns(4)
 
         with colA:
-            st.metric("Total applications", len(borrowers))
+            st.metric("Total applications", len(store))
 
         with colB:
-            st.metric("Approved", borrowers[borrowers["Status"] == "Approved"].shape[0])
+            st.metric("Approved", store.count("Status", "Approved"))
 
         with colC:
-            st.metric("In review", borrowers[borrowers["Status"] == "In review"].shape[0])
+            st.metric("In review", store.count("Status", "In review"))
 
         with colD:
-            avg_score = int(borrowers["AI Score"].mean())
+            avg_score = int(store.mean_score())
             st.metric("Avg. AI score", avg_score)
 
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # ================== EXPECTED REPAYMENTS ==================
+    with st.container():
+        st.markdown('<div class="bc-card-box">', unsafe_allow_html=True)
+        st.markdown('<div class="bc-pill">Expected Repayments</div>', unsafe_allow_html=True)
+
+        if len(loan_ledger) == 0:
+            st.info("No accepted micro-loans yet. Accepted offers will show their projected repayments here.")
+        else:
+            weekly = loan_ledger.project("W")
+            colA, colB = st.columns(2)
+            with colA:
+                st.metric("Accepted loans", len(loan_ledger))
+            with colB:
+                st.metric("Expected repayments", f"${weekly.sum():,.2f}")
+            st.bar_chart(weekly.rename("Expected inflow (USD)").rename_axis("Week").to_timestamp())
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
     # ================== FILTERS & DOWNLOAD ==================
     with st.container():
         st.markdown('<div class="bc-card-box">', unsafe_allow_html=True)
         st.markdown('<div class="bc-pill">Filters & Export</div>', unsafe_allow_html=True)
 
+        countries = store.values("Country")
+        statuses = store.values("Status")
+        lowest, highest = store.score_bounds()
+
+        # Live facet counts: under each multiselect, how many applicants per option match all
+        # the *other* active filters. Widgets are keyed so their current values can be read
+        # first. Option labels stay plain values: Streamlit derives the widget ID from them,
+        # so counts in the labels would reset the selection whenever a count changed.
+        score_state = st.session_state.get("filter_score", (lowest, highest))
+        criteria = dict(
+            countries=st.session_state.get("filter_country", countries),
+            risk_bands=st.session_state.get("filter_risk", RISK_BANDS),
+            statuses=st.session_state.get("filter_status", statuses),
+            score_range=(max(score_state[0], lowest), min(score_state[1], highest)),
+            max_volatility=st.session_state.get("filter_vol", 100),
+        )
+        facets = {col: store.facet_counts(col, **criteria) for col in ("Country", "Risk band", "Status")}
+
+        def facet_caption(column, options):
+            st.caption(" · ".join(f"{value} {facets[column].get(value, 0):,}" for value in options))
+
         col1, col2, col3 = st.columns(3)
 
         with col1:
             country_filter = st.multiselect(
                 "Country",
-                sorted(borrowers["Country"].unique().tolist()),
-                default=sorted(borrowers["Country"].unique().tolist()),
+                countries,
+                default=countries,
+                key="filter_country",
             )
+            facet_caption("Country", countries)
 
         with col2:
             risk_filter = st.multiselect(
                 "Risk band",
-                ["Low", "Medium", "High"],
-                default=["Low", "Medium", "High"],
+                RISK_BANDS,
+                default=RISK_BANDS,
+                key="filter_risk",
             )
+            facet_caption("Risk band", RISK_BANDS)
 
         with col3:
+            status_filter = st.multiselect(
+                "Status",
+                statuses,
+                default=statuses,
+                key="filter_status",
+            )
+            facet_caption("Status", statuses)
+
+        col4, col5 = st.columns(2)
+
+        with col4:
             score_min, score_max = st.slider(
                 "AI score range",
-                min_value=int(borrowers["AI Score"].min()),
-                max_value=int(borrowers["AI Score"].max()),
-                value=(
-                    int(borrowers["AI Score"].min()),
-                    int(borrowers["AI Score"].max()),
-                ),
+                min_value=lowest,
+                max_value=highest,
+                value=(lowest, highest),
+                key="filter_score",
             )
 
-        vol_max = st.slider(
-            "Max volatility (0–100)",
-            min_value=0,
-            max_value=100,
-            value=100,
-        )
+        with col5:
+            vol_max = st.slider(
+                "Max volatility (0–100)",
+                min_value=0,
+                max_value=100,
+                value=100,
+                key="filter_vol",
+            )
 
-        # Apply filters
-        filt = (
-            borrowers["Country"].isin(country_filter)
-            & borrowers["Risk band"].isin(risk_filter)
-            & borrowers["AI Score"].between(score_min, score_max)
-            & (borrowers["Volatility"] <= vol_max)
+        # Apply filters through the store's bitmap and sorted indexes
+        matches = store.filter(
+            countries=country_filter,
+            risk_bands=risk_filter,
+            statuses=status_filter,
+            score_range=(score_min, score_max),
+            max_volatility=vol_max,
         )
-        filtered = borrowers[filt].copy()
 
         st.write("Filtered applications:")
-        st.dataframe(
-            filtered[["Name", "Country", "Risk band", "Requested", "AI Score", "Volatility", "Status"]],
-            use_container_width=True,
+        filtered = paged_table(
+            store,
+            matches,
+            ["Name", "Country", "Risk band", "Requested", "AI Score", "Volatility", "Status"],
+            key="filtered",
         )
 
         st.write("")
-        csv_data = borrowers.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="⬇️ Download borrower data (CSV)",
-            data=csv_data,
-            file_name="bc_borrowers_demo.csv",
-            mime="text/csv",
+        # Exports are only built on request, from the filtered rows, chunk by chunk
+        export_fmt = st.radio("Export format", list(EXPORT_FORMATS), format_func=EXPORT_LABELS.get, horizontal=True)
+        export_key = (
+            export_fmt, store.version, tuple(country_filter), tuple(risk_filter), tuple(status_filter),
+            score_min, score_max, vol_max,
         )
 
+        prepared = st.session_state.get("borrower_export")
+        if st.button(f"Prepare export of {len(matches):,} filtered applications"):
+            prepared = prepare_export(store, matches, export_fmt, export_key)
+
+        if prepared is not None and prepared["key"] == export_key:
+            ext, _ = EXPORT_FORMATS[export_fmt]
+            export = prepared["file"]
+            with open(export.path, "rb") as f:
+                st.download_button(
+                    label=f"⬇️ Download borrower data ({EXPORT_LABELS[export_fmt]}, {export.rows:,} rows)",
+                    data=f,
+                    file_name=f"bc_borrowers_demo.{ext}",
+                    mime=export.mime,
+                )
+
         st.markdown("</div>", unsafe_allow_html=True)
 
     # ================== REAL-TIME APPROVAL QUEUE ==================
@@ -285,12 +430,12 @@ def render_lender_portal():
         st.markdown('<div class="bc-card-box">', unsafe_allow_html=True)
         st.markdown('<div class="bc-pill">Real-Time Approval Queue</div>', unsafe_allow_html=True)
 
-        queue = borrowers[borrowers["Status"] == "In review"][["Name", "Country", "Requested", "AI Score", "Risk band"]]
+        queue = store.filter(statuses=["In review"])
 
-        if queue.empty:
+        if len(queue) == 0:
             st.info("No applications in review. All caught up ✅")
         else:
-            st.dataframe(queue, use_container_width=True)
+            paged_table(store, queue, ["Name", "Country", "Requested", "AI Score", "Risk band"], key="queue")
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -299,22 +444,23 @@ def render_lender_portal():
         st.markdown('<div class="bc-card-box">', unsafe_allow_html=True)
         st.markdown('<div class="bc-pill">Borrower Detail</div>', unsafe_allow_html=True)
 
-        if filtered.empty:
+        if len(matches) == 0:
             st.warning("No borrowers match the current filters. Adjust filters to view applicants.")
             st.markdown("</div>", unsafe_allow_html=True)
+            if sandbox:
+                render_sandbox_bar(sandbox_bar, store, shared)
             return
 
         selected_name = st.selectbox(
-            "Choose an applicant to review",
+            "Choose an applicant to review (from the current page)",
             filtered["Name"].tolist(),
         )
 
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Get the selected borrower (from the full table, not just filtered)
-    borrowers = st.session_state["borrowers"]  # re-read in case updated
-    borrower_row = borrowers[borrowers["Name"] == selected_name].iloc[0]
-    idx = borrowers[borrowers["Name"] == selected_name].index[0]
+    borrower_row = store.get_by_name(selected_name)
+    borrower_id = borrower_row["ID"]
 
     # ================== BORROWER DETAILS PANEL ==================
     with st.container():
@@ -424,34 +570,41 @@ def render_lender_portal():
         with colB:
             decline_clicked = st.button("❌ Decline this application")
 
-        # Handle decisions with state updates
-        if approve_clicked and disburse_amount > 0:
-            borrowers = st.session_state["borrowers"]
-            borrowers.at[idx, "Status"] = "Approved"
+        # Handle decisions as one transaction each. A decision only applies if the status
+        # is still the one this session last displayed, so two lenders acting on the same
+        # application cannot both win.
+        seen_status = st.session_state.setdefault("lender_seen_status", {})
+        expected_status = seen_status.get(borrower_id, borrower_row["Status"])
+        seen_status[borrower_id] = borrower_row["Status"]
+        stale_msg = f"{borrower_row['Name']}'s application was updated by another lender. Review the latest status before deciding."
 
+        if approve_clicked and disburse_amount > 0:
             # Simulate funds movement
-            if disburse_channel == "BC Wallet":
-                borrowers.at[idx, "Wallet balance"] = borrowers.at[idx, "Wallet balance"] + disburse_amount
+            balance_column = "Wallet balance" if disburse_channel == "BC Wallet" else "Bank balance"
+
+            if store.decide(borrower_id, "Approved", balance_column, disburse_amount, expected_status=expected_status):
+                seen_status[borrower_id] = "Approved"
+                st.success(
+                    f"Approved ${disburse_amount} to {disburse_channel} for {borrower_row['Name']} (demo simulation only)."
+                )
+                st.caption("In production, this would trigger a real disbursement via a payments rail / partner.")
             else:
-                borrowers.at[idx, "Bank balance"] = borrowers.at[idx, "Bank balance"] + disburse_amount
-
-            st.session_state["borrowers"] = borrowers
-
-            st.success(
-                f"Approved ${disburse_amount} to {disburse_channel} for {borrower_row['Name']} (demo simulation only)."
-            )
-            st.caption("In production, this would trigger a real disbursement via a payments rail / partner.")
+                st.warning(stale_msg)
         elif approve_clicked and disburse_amount == 0:
             st.warning("Disbursement amount must be greater than 0 to approve.")
 
         if decline_clicked:
-            borrowers = st.session_state["borrowers"]
-            borrowers.at[idx, "Status"] = "Declined"
-            st.session_state["borrowers"] = borrowers
-            st.error(f"Application for {borrower_row['Name']} marked as Declined.")
+            if store.decide(borrower_id, "Declined", expected_status=expected_status):
+                seen_status[borrower_id] = "Declined"
+                st.error(f"Application for {borrower_row['Name']} marked as Declined.")
+            else:
+                st.warning(stale_msg)
 
         st.markdown("</div>", unsafe_allow_html=True)
 
+    if sandbox:
+        render_sandbox_bar(sandbox_bar, store, shared)
+
 
 # ---------- CALL ----------
 render_lender_portal()
@@ -0,0 +1,466 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from utils.borrowers import BALANCE_COLUMNS, BORROWER_COLUMNS, INDEXED_COLUMNS, FacetIndex, risk_band
+
+# portal column -> SQL column
+SQL_COLUMNS = {
+    "ID": "id",
+    "Name": "name",
+    "Country": "country",
+    "Requested": "requested",
+    "AI Score": "ai_score",
+    "Volatility": "volatility",
+    "Flags": "flags",
+    "Status": "status",
+    "Wallet balance": "wallet_balance",
+    "Bank balance": "bank_balance",
+    "Risk band": "risk_band",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS borrowers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    country TEXT NOT NULL,
+    requested INTEGER NOT NULL,
+    ai_score INTEGER NOT NULL,
+    volatility INTEGER NOT NULL,
+    flags TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    wallet_balance INTEGER NOT NULL DEFAULT 0,
+    bank_balance INTEGER NOT NULL DEFAULT 0,
+    risk_band TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_borrowers_name ON borrowers (name);
+-- covering indexes: filters, counts and sort keys resolve without touching the table
+CREATE INDEX IF NOT EXISTS ix_borrowers_country ON borrowers (country, risk_band, status, ai_score, volatility);
+CREATE INDEX IF NOT EXISTS ix_borrowers_status ON borrowers (status, country, risk_band, ai_score, volatility);
+CREATE INDEX IF NOT EXISTS ix_borrowers_ai_score ON borrowers (ai_score, volatility, country, risk_band, status);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+-- running row count and score sum for the whole book (dimension '') and per facet value
+CREATE TABLE IF NOT EXISTS portfolio_stats (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    score_sum INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+"""
+
+# facet columns whose per-value counts are kept in portfolio_stats
+_FACETS = ("country", "risk_band", "status")
+
+
+def _stats_delta(row: str, sign: str) -> str:
+    """Statements adding (sign '') or removing (sign '-') trigger row NEW/OLD from portfolio_stats."""
+    targets = [("''", "''")] + [(f"'{col}'", f"{row}.{col}") for col in _FACETS]
+    return "\n".join(
+        f"    INSERT INTO portfolio_stats (dimension, value, n, score_sum) "
+        f"VALUES ({dim}, {value}, {sign}1, {sign}{row}.ai_score) "
+        f"ON CONFLICT (dimension, value) DO UPDATE SET n = n + excluded.n, score_sum = score_sum + excluded.score_sum;"
+        for dim, value in targets
+    )
+
+
+# triggers keep portfolio_stats current inside the same transaction as every write
+_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS tr_borrowers_stats_insert AFTER INSERT ON borrowers BEGIN
+{_stats_delta("NEW", "")}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_borrowers_stats_delete AFTER DELETE ON borrowers BEGIN
+{_stats_delta("OLD", "-")}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_borrowers_stats_update AFTER UPDATE OF {", ".join(_FACETS)}, ai_score ON borrowers BEGIN
+{_stats_delta("OLD", "-")}
+{_stats_delta("NEW", "")}
+END;
+"""
+
+_BACKFILL = ["SELECT '', '', COUNT(*), COALESCE(SUM(ai_score), 0) FROM borrowers"] + [
+    f"SELECT '{col}', {col}, COUNT(*), SUM(ai_score) FROM borrowers GROUP BY {col}" for col in _FACETS
+]
+
+
+class _Conflict(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Reusable SQLite connections (WAL, autocommit) handed out one per caller at a time."""
+
+    def __init__(self, path: str, size: int = 8, timeout: float = 10.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """A write transaction: BEGIN IMMEDIATE takes the write lock up front, so read-check-write is atomic."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Selection:
+    """A filtered view of a SqliteBorrowerStore: a WHERE clause, its parameters and a lazy row count.
+
+    The count comes from the store's FacetIndex when the filter criteria are known.
+    """
+
+    def __init__(self, store, where: str, params: tuple, criteria: dict = None):
+        self.store = store
+        self.where = where
+        self.params = params
+        self.criteria = criteria
+        self._count = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            if self.criteria is not None:
+                self._count = self.store.facets().matching(**self.criteria)
+            else:
+                self._count = self.store._scalar(f"SELECT COUNT(*) FROM borrowers WHERE {self.where}", self.params)
+        return self._count
+
+
+class SqliteBorrowerStore:
+    """Process-wide borrower book in a local SQLite file (WAL mode), shared by every session.
+
+    Offers the same read and write calls as BorrowerStore; filters return a Selection
+    that pages, counts and exports through indexed queries instead of row positions.
+    Writers serialize on SQLite's write lock while readers keep reading the last
+    committed snapshot. A version counter in `meta` is bumped by every write, and
+    triggers keep book-wide and per Country / Risk band / Status counts and score
+    sums in `portfolio_stats`, so overview figures are single-row reads. Filter
+    counts and live facet counts come from an in-process FacetIndex over the filter
+    columns; this store's own writes patch it in place, and it is reloaded when the
+    version shows a write from elsewhere.
+    """
+
+    def __init__(self, path: str, seed: pd.DataFrame = None, pool_size: int = 8):
+        self.path = path
+        self._pool = ConnectionPool(path, pool_size)
+        self._facets = None
+        self._facet_ids = None  # (sorted IDs, their FacetIndex positions)
+        self._facets_lock = threading.Lock()
+        with self._pool.connection() as conn:
+            conn.executescript(_SCHEMA + _TRIGGERS)
+        with self._pool.transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM portfolio_stats").fetchone()[0] == 0:
+                for select in _BACKFILL:
+                    conn.execute(f"INSERT INTO portfolio_stats (dimension, value, n, score_sum) {select}")
+        if seed is not None and len(self) == 0:
+            self.insert(seed)
+            with self._pool.connection() as conn:
+                conn.execute("ANALYZE")
+
+    def close(self) -> None:
+        self._pool.close()
+
+    # ---------- helpers ----------
+    def _scalar(self, sql: str, params: tuple = ()):
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def _frame(self, sql: str, params: tuple, columns) -> pd.DataFrame:
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=list(columns))
+
+    @staticmethod
+    def _select(columns) -> str:
+        return ", ".join(SQL_COLUMNS[c] for c in columns)
+
+    def _row(self, where: str, params: tuple):
+        frame = self._frame(
+            f"SELECT {self._select(BORROWER_COLUMNS)} FROM borrowers WHERE {where} ORDER BY id LIMIT 1",
+            params,
+            BORROWER_COLUMNS,
+        )
+        return None if frame.empty else frame.iloc[0].to_dict()
+
+    @property
+    def version(self) -> int:
+        return self._scalar("SELECT value FROM meta WHERE key = 'version'")
+
+    @staticmethod
+    def _bump(conn) -> int:
+        return conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version' RETURNING value").fetchall()[0][0]
+
+    # ---------- facet index ----------
+    def facets(self) -> FacetIndex:
+        """FacetIndex over the whole book at the current version (rows in ID order)."""
+        version = self.version
+        with self._facets_lock:
+            if self._facets is None or self._facets.version != version:
+                columns = ["ID", "Country", "Risk band", "Status", "AI Score", "Volatility"]
+                with self._pool.connection() as conn:
+                    conn.execute("BEGIN")
+                    version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+                    rows = conn.execute(f"SELECT {self._select(columns)} FROM borrowers ORDER BY id").fetchall()
+                    conn.execute("COMMIT")
+                frame = pd.DataFrame(rows, columns=columns)
+                self._facet_ids = (frame["ID"].to_numpy(), np.arange(len(frame)))
+                self._facets = FacetIndex(frame, version)
+            return self._facets
+
+    def _facet_position(self, borrower_id) -> int:
+        ids, positions = self._facet_ids
+        return int(positions[np.searchsorted(ids, borrower_id)])
+
+    def _sync_facets(self, version: int, moves) -> None:
+        """Patch the FacetIndex with this store's own status moves [(id, old, new)] committed at version."""
+        with self._facets_lock:
+            facets = self._facets
+            if facets is None or facets.version != version - 1:
+                return  # reloaded on next use
+            for borrower_id, old, new in moves:
+                facets.set(self._facet_position(borrower_id), "Status", old, new)
+            facets.version = version
+
+    def _append_facets(self, version: int, borrowers: pd.DataFrame) -> None:
+        """Add this store's own inserts, committed at version, to the end of the FacetIndex."""
+        with self._facets_lock:
+            facets = self._facets
+            if facets is None or facets.version != version - 1:
+                return  # reloaded on next use
+            ids, positions = self._facet_ids
+            new_ids = borrowers["ID"].to_numpy()
+            new_order = np.argsort(new_ids, kind="stable")
+            at = np.searchsorted(ids, new_ids[new_order])
+            self._facet_ids = (np.insert(ids, at, new_ids[new_order]), np.insert(positions, at, facets.n + new_order))
+            facets.append(borrowers)
+            facets.version = version
+
+    def _stats(self, dimension: str, value: str = ""):
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT n, score_sum FROM portfolio_stats WHERE dimension = ? AND value = ?", (dimension, value)
+            ).fetchone()
+        return row or (0, 0)
+
+    def __len__(self) -> int:
+        return self._stats("")[0]
+
+    # ---------- point lookups ----------
+    def get(self, borrower_id):
+        return self._row("id = ?", (int(borrower_id),))
+
+    def get_by_name(self, name: str):
+        return self._row("name = ?", (name,))
+
+    # ---------- index scans ----------
+    def facet_counts(self, column: str, **criteria) -> dict:
+        """Applicants per value of an indexed column under every criterion except column's own.
+
+        Without criteria this reads the maintained aggregates; with them, the FacetIndex.
+        """
+        if any(v is not None for v in criteria.values()):
+            return self.facets().facet_counts(column, **criteria)
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT value, n FROM portfolio_stats WHERE dimension = ? AND n > 0 ORDER BY value",
+                (SQL_COLUMNS[column],),
+            )
+            return dict(rows.fetchall())
+
+    def values(self, column: str) -> list:
+        return list(self.facet_counts(column))
+
+    def count(self, column: str, value) -> int:
+        return self._stats(SQL_COLUMNS[column], value)[0]
+
+    def score_bounds(self) -> tuple:
+        with self._pool.connection() as conn:
+            lo, hi = conn.execute(
+                "SELECT (SELECT MIN(ai_score) FROM borrowers), (SELECT MAX(ai_score) FROM borrowers)"
+            ).fetchone()
+        return int(lo), int(hi)
+
+    def mean_score(self) -> float:
+        n, score_sum = self._stats("")
+        return score_sum / n if n else float("nan")
+
+    def filter(self, countries=None, risk_bands=None, statuses=None, score_range=None, max_volatility=None) -> Selection:
+        clauses, params = [], []
+        for column, values in zip(INDEXED_COLUMNS, (countries, risk_bands, statuses)):
+            if values is None:
+                continue
+            values = list(dict.fromkeys(values))
+            if not values:
+                clauses.append("0")
+                continue
+            clauses.append(f"{SQL_COLUMNS[column]} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if score_range is not None:
+            clauses.append("ai_score BETWEEN ? AND ?")
+            params.extend(int(v) for v in score_range)
+        if max_volatility is not None:
+            clauses.append("volatility <= ?")
+            params.append(max_volatility)
+        criteria = dict(
+            countries=countries, risk_bands=risk_bands, statuses=statuses,
+            score_range=score_range, max_volatility=max_volatility,
+        )
+        return Selection(self, " AND ".join(clauses) or "1", tuple(params), criteria)
+
+    # ---------- sorted, paged views ----------
+    def page(self, positions=None, number: int = 0, size: int = 25, sort_by: str = "ID",
+             descending: bool = False, columns=None) -> pd.DataFrame:
+        """One page of a Selection (default: whole book) ordered by sort_by, ties broken by ascending ID."""
+        selection = positions if positions is not None else self.filter()
+        columns = list(columns or BORROWER_COLUMNS)
+        direction = "DESC" if descending else "ASC"
+        # pick the page's IDs from the covering indexes first, then fetch just those rows
+        order = f"borrowers.{SQL_COLUMNS[sort_by]} {direction}, borrowers.id ASC"
+        sql = (
+            f"SELECT {self._select(columns)} FROM borrowers JOIN ("
+            f"SELECT id FROM borrowers WHERE {selection.where} ORDER BY {order} LIMIT ? OFFSET ?"
+            f") AS page USING (id) ORDER BY {order}"
+        )
+        return self._frame(sql, selection.params + (size, max(number, 0) * size), columns)
+
+    def iter_frames(self, positions=None, chunksize: int = 100_000, columns=None):
+        """Yield a Selection (default: whole book) in ID order as frames of at most chunksize rows.
+
+        An empty selection yields one empty frame, so writers still see the columns.
+        """
+        selection = positions if positions is not None else self.filter()
+        columns = list(columns or BORROWER_COLUMNS)
+        with self._pool.connection() as conn:
+            cursor = conn.execute(
+                f"SELECT {self._select(columns)} FROM borrowers WHERE {selection.where} ORDER BY id",
+                selection.params,
+            )
+            rows = cursor.fetchmany(chunksize)
+            yield pd.DataFrame(rows, columns=columns)
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    return
+                yield pd.DataFrame(rows, columns=columns)
+
+    # ---------- writes ----------
+    def insert(self, borrowers: pd.DataFrame) -> None:
+        """Append applicants in one transaction; fails (and inserts nothing) if an ID already exists."""
+        borrowers = borrowers.copy()
+        if "Risk band" not in borrowers:
+            borrowers["Risk band"] = risk_band(borrowers["AI Score"].to_numpy())
+        rows = list(zip(*(borrowers[c].tolist() for c in BORROWER_COLUMNS)))
+        sql = f"INSERT INTO borrowers ({self._select(BORROWER_COLUMNS)}) VALUES ({', '.join('?' * len(BORROWER_COLUMNS))})"
+        try:
+            with self._pool.transaction() as conn:
+                conn.executemany(sql, rows)
+                version = self._bump(conn)
+        except sqlite3.IntegrityError as exc:
+            raise ValueError(f"borrower IDs already exist: {exc}") from exc
+        self._append_facets(version, borrowers)
+
+    def decide(self, borrower_id, status: str, balance_column=None, amount=0, expected_status=None) -> bool:
+        """Set status (and credit a balance) in one transaction; False if the status is no longer expected_status."""
+        if balance_column is not None and balance_column not in BALANCE_COLUMNS:
+            raise ValueError(f"balance_column must be one of {BALANCE_COLUMNS}")
+        sets, params = ["status = ?"], [status]
+        if balance_column is not None:
+            col = SQL_COLUMNS[balance_column]
+            sets.append(f"{col} = {col} + ?")
+            params.append(amount)
+        sql = f"UPDATE borrowers SET {', '.join(sets)} WHERE id = ?"
+        params.append(int(borrower_id))
+        if expected_status is not None:
+            sql += " AND status = ?"
+            params.append(expected_status)
+        with self._pool.transaction() as conn:
+            old = conn.execute("SELECT status FROM borrowers WHERE id = ?", (int(borrower_id),)).fetchone()
+            changed = conn.execute(sql, params).rowcount
+            if changed:
+                version = self._bump(conn)
+        if changed:
+            self._sync_facets(version, [(int(borrower_id), old[0], status)])
+        return bool(changed)
+
+    def set_status(self, borrower_id, status: str) -> None:
+        if not self.decide(borrower_id, status):
+            raise KeyError(borrower_id)
+
+    def add_balance(self, borrower_id, column: str, amount) -> None:
+        if column not in BALANCE_COLUMNS:
+            raise ValueError(f"column must be one of {BALANCE_COLUMNS}")
+        col = SQL_COLUMNS[column]
+        with self._pool.transaction() as conn:
+            if not conn.execute(f"UPDATE borrowers SET {col} = {col} + ? WHERE id = ?", (amount, int(borrower_id))).rowcount:
+                raise KeyError(borrower_id)
+            version = self._bump(conn)
+        self._sync_facets(version, [])
+
+    def apply_changes(self, changes) -> list:
+        """Apply overlay changes (see BorrowerOverlay.changes) all-or-nothing.
+
+        Each change sets a status and credits balances, provided the row still has its
+        "Base status". Returns the IDs that no longer do; then nothing is written.
+        """
+        sql = (
+            "UPDATE borrowers SET status = ?, wallet_balance = wallet_balance + ?, "
+            "bank_balance = bank_balance + ? WHERE id = ? AND status = ?"
+        )
+        conflicts = []
+        try:
+            with self._pool.transaction() as conn:
+                for change in changes:
+                    params = (
+                        change["Status"], change["Wallet balance"], change["Bank balance"],
+                        int(change["ID"]), change["Base status"],
+                    )
+                    if not conn.execute(sql, params).rowcount:
+                        conflicts.append(change["ID"])
+                if conflicts:
+                    raise _Conflict
+                version = self._bump(conn) if changes else None
+        except _Conflict:
+            return conflicts
+        if version is not None:
+            self._sync_facets(version, [(int(c["ID"]), c["Base status"], c["Status"]) for c in changes])
+        return conflicts
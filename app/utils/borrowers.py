@@ -0,0 +1,630 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+BORROWER_COLUMNS = [
+    "ID", "Name", "Country", "Requested", "AI Score", "Volatility", "Flags",
+    "Status", "Wallet balance", "Bank balance", "Risk band",
+]
+INDEXED_COLUMNS = ("Country", "Risk band", "Status")
+RISK_BANDS = ["Low", "Medium", "High"]
+STATUSES = ["In review", "Approved", "Declined"]
+BALANCE_COLUMNS = ("Wallet balance", "Bank balance")
+RANGE_COLUMNS = ("AI Score", "Volatility")
+
+
+def risk_band(score):
+    """Low (>= 760), Medium (>= 620) or High; works on a scalar or an array of scores."""
+    bands = np.select([np.asarray(score) >= 760, np.asarray(score) >= 620], RISK_BANDS[:2], RISK_BANDS[2])
+    return bands if np.ndim(score) else str(bands)
+
+
+def demo_borrowers() -> pd.DataFrame:
+    """The four demo applicants shown in the Lender Portal."""
+    borrowers = pd.DataFrame(
+        [
+            {
+                "ID": 1,
+                "Name": "John Rivera",
+                "Country": "Philippines",
+                "Requested": 150,
+                "AI Score": 712,
+                "Volatility": 27,
+                "Flags": "Low volatility, Clean history",
+                "Status": "In review",
+                "Wallet balance": 45,
+                "Bank balance": 320,
+            },
+            {
+                "ID": 2,
+                "Name": "Lina Chen",
+                "Country": "Malaysia",
+                "Requested": 80,
+                "AI Score": 640,
+                "Volatility": 48,
+                "Flags": "Medium volatility",
+                "Status": "In review",
+                "Wallet balance": 120,
+                "Bank balance": 510,
+            },
+            {
+                "ID": 3,
+                "Name": "Samuel Okoro",
+                "Country": "Kenya",
+                "Requested": 220,
+                "AI Score": 560,
+                "Volatility": 72,
+                "Flags": "High volatility, Thin file",
+                "Status": "In review",
+                "Wallet balance": 30,
+                "Bank balance": 190,
+            },
+            {
+                "ID": 4,
+                "Name": "Maria Gomez",
+                "Country": "Colombia",
+                "Requested": 300,
+                "AI Score": 785,
+                "Volatility": 18,
+                "Flags": "Strong stability",
+                "Status": "Approved",
+                "Wallet balance": 260,
+                "Bank balance": 1100,
+            },
+        ]
+    )
+    borrowers["Risk band"] = risk_band(borrowers["AI Score"].to_numpy())
+    return borrowers
+
+
+def synthetic_borrowers(n: int, seed: int = 0, start_id: int = 1) -> pd.DataFrame:
+    """A random book of n applicants with the portal's columns, for load testing."""
+    rng = np.random.default_rng(seed)
+    countries = np.array(["Philippines", "Malaysia", "Kenya", "Colombia", "Nigeria", "Mexico", "India", "Vietnam"])
+    flags = np.array(["Low volatility, Clean history", "Medium volatility", "High volatility, Thin file", "Strong stability"])
+    ids = np.arange(start_id, start_id + n)
+    score = rng.integers(450, 851, n)
+    borrowers = pd.DataFrame(
+        {
+            "ID": ids,
+            "Name": np.char.add("Applicant ", ids.astype(str)),
+            "Country": countries[rng.integers(0, len(countries), n)],
+            "Requested": rng.integers(2, 81, n) * 10,
+            "AI Score": score,
+            "Volatility": rng.integers(0, 101, n),
+            "Flags": flags[rng.integers(0, len(flags), n)],
+            "Status": np.array(STATUSES)[rng.choice(3, n, p=[0.6, 0.3, 0.1])],
+            "Wallet balance": rng.integers(0, 500, n),
+            "Bank balance": rng.integers(0, 2000, n),
+        }
+    )
+    borrowers["Risk band"] = risk_band(score)
+    return borrowers
+
+
+class FacetIndex:
+    """Packed bitmaps per Country / Risk band / Status value plus sorted AI Score and Volatility.
+
+    Rows are addressed by position 0..n-1. A filter ORs the bitmaps of the chosen values
+    within each facet, ANDs the facets together with bitmaps cut from the sorted score and
+    volatility arrays (two searchsorted calls per range), and counts are popcounts; the
+    live count for a facet value applies every constraint except that facet's own.
+    Status moves (set) and appended rows (append) are patched in without a rebuild.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version=0):
+        self.n = len(frame)
+        self.version = version
+        self._bitmaps, self._counts = {}, {}
+        for col in INDEXED_COLUMNS:
+            codes, uniques = pd.factorize(frame[col])
+            self._bitmaps[col] = {value: np.packbits(codes == i) for i, value in enumerate(uniques)}
+            self._counts[col] = dict(zip(uniques, np.bincount(codes[codes >= 0], minlength=len(uniques)).tolist()))
+        self._sorted = {}
+        for col in RANGE_COLUMNS:
+            values = frame[col].to_numpy()
+            order = np.argsort(values, kind="stable")
+            self._sorted[col] = (values[order], order)
+
+    # ---------- facets ----------
+    def values(self, column: str) -> list:
+        return sorted(value for value, n in self._counts[column].items() if n)
+
+    def count(self, column: str, value) -> int:
+        return self._counts[column].get(value, 0)
+
+    def set(self, pos: int, column: str, old, new) -> None:
+        """Move row pos from value old to value new of column."""
+        if old == new:
+            return
+        byte, bit = pos >> 3, np.uint8(0x80 >> (pos & 7))
+        bitmaps = self._bitmaps[column]
+        if new not in bitmaps:
+            bitmaps[new] = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        bitmaps[old][byte] &= ~bit
+        bitmaps[new][byte] |= bit
+        self._counts[column][old] -= 1
+        self._counts[column][new] = self._counts[column].get(new, 0) + 1
+
+    def append(self, frame: pd.DataFrame) -> None:
+        """Index frame's rows as positions n..n+len(frame)-1: grow the bitmaps, merge the sorted arrays."""
+        start = self.n
+        self.n += len(frame)
+        nbytes = (self.n + 7) // 8
+        for col in INDEXED_COLUMNS:
+            bitmaps, counts = self._bitmaps[col], self._counts[col]
+            for value, bitmap in bitmaps.items():
+                if len(bitmap) < nbytes:
+                    bitmaps[value] = np.concatenate([bitmap, np.zeros(nbytes - len(bitmap), dtype=np.uint8)])
+            codes, uniques = pd.factorize(frame[col])
+            for i, value in enumerate(uniques):
+                rows = start + np.flatnonzero(codes == i)
+                if value not in bitmaps:
+                    bitmaps[value] = np.zeros(nbytes, dtype=np.uint8)
+                np.bitwise_or.at(bitmaps[value], rows >> 3, (0x80 >> (rows & 7)).astype(np.uint8))
+                counts[value] = counts.get(value, 0) + len(rows)
+        for col in RANGE_COLUMNS:
+            values, order = self._sorted[col]
+            new = frame[col].to_numpy()
+            new_order = np.argsort(new, kind="stable")
+            at = np.searchsorted(values, new[new_order], "right")  # after equal values: keeps the sort stable
+            self._sorted[col] = (
+                np.insert(values.astype(np.result_type(values, new), copy=False), at, new[new_order]),
+                np.insert(order, at, start + new_order),
+            )
+
+    # ---------- ranges ----------
+    def bounds(self, column: str) -> tuple:
+        values = self._sorted[column][0]
+        return values[0].item(), values[-1].item()
+
+    def _range(self, column: str, lo=None, hi=None):
+        values, order = self._sorted[column]
+        i = 0 if lo is None else np.searchsorted(values, lo, "left")
+        j = self.n if hi is None else np.searchsorted(values, hi, "right")
+        if i == 0 and j == self.n:
+            return None
+        mask = np.zeros(self.n, dtype=bool)
+        mask[order[i:j]] = True
+        return np.packbits(mask)
+
+    # ---------- combining ----------
+    def _any(self, column: str, values) -> np.ndarray:
+        bitmaps = self._bitmaps[column]
+        hits = [bitmaps[v] for v in dict.fromkeys(values) if v in bitmaps]
+        if not hits:
+            return np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        return hits[0].copy() if len(hits) == 1 else np.bitwise_or.reduce(hits)
+
+    def constraints(self, countries=None, risk_bands=None, statuses=None, score_range=None, max_volatility=None) -> dict:
+        """One bitmap per active constraint, keyed by column (None criteria are skipped)."""
+        out = {}
+        for column, values in zip(INDEXED_COLUMNS, (countries, risk_bands, statuses)):
+            if values is not None:
+                out[column] = self._any(column, values)
+        ranges = {"AI Score": score_range, "Volatility": None if max_volatility is None else (None, max_volatility)}
+        for column, bounds in ranges.items():
+            if bounds is not None:
+                bitmap = self._range(column, *bounds)
+                if bitmap is not None:
+                    out[column] = bitmap
+        return out
+
+    @staticmethod
+    def _and(bitmaps):
+        bitmaps = list(bitmaps)
+        if not bitmaps:
+            return None
+        return bitmaps[0] if len(bitmaps) == 1 else np.bitwise_and.reduce(bitmaps)
+
+    def positions(self, **criteria) -> np.ndarray:
+        """Sorted positions of the rows matching every criterion."""
+        bitmap = self._and(self.constraints(**criteria).values())
+        if bitmap is None:
+            return np.arange(self.n)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+
+    def matching(self, **criteria) -> int:
+        bitmap = self._and(self.constraints(**criteria).values())
+        return self.n if bitmap is None else int(np.bitwise_count(bitmap).sum())
+
+    def facet_counts(self, column: str, **criteria) -> dict:
+        """Rows per value of column that match every criterion except the one on column itself."""
+        others = self._and(b for c, b in self.constraints(**criteria).items() if c != column)
+        if others is None:
+            return {value: self.count(column, value) for value in self.values(column)}
+        return {
+            value: int(np.bitwise_count(self._bitmaps[column][value] & others).sum())
+            for value in self.values(column)
+        }
+
+
+class BorrowerStore:
+    """Borrower book with hash indexes on ID and Name and a FacetIndex over the filter columns.
+
+    Rows live in one DataFrame addressed by position. ID and Name resolve to a
+    position through dicts; filters and live facet counts resolve through the
+    FacetIndex's bitmaps and sorted score / volatility arrays. Sorted views keep a
+    cached (column, ID) ordering of the whole book, so paging a filtered result
+    only materializes the rows on the requested page.
+    """
+
+    def __init__(self, borrowers: pd.DataFrame):
+        self._frame = borrowers[BORROWER_COLUMNS].reset_index(drop=True).copy()
+        self._lock = threading.RLock()
+        self.version = 0
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._by_id = {}
+        self._by_name = {}
+        for pos, (bid, name) in enumerate(zip(self._frame["ID"].tolist(), self._frame["Name"].tolist())):
+            self._by_id[bid] = pos
+            self._by_name.setdefault(name, pos)
+        self._facets = FacetIndex(self._frame)
+        self._orders = {}
+        self._score_sum = int(self._frame["AI Score"].sum())
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    # ---------- point lookups ----------
+    def position(self, borrower_id) -> int:
+        return self._by_id[borrower_id]
+
+    def row(self, pos: int) -> dict:
+        return self._frame.iloc[pos].to_dict()
+
+    def get(self, borrower_id):
+        pos = self._by_id.get(borrower_id)
+        return None if pos is None else self.row(pos)
+
+    def get_by_name(self, name: str):
+        pos = self._by_name.get(name)
+        return None if pos is None else self.row(pos)
+
+    # ---------- index scans ----------
+    def values(self, column: str) -> list:
+        """Distinct values of an indexed column that currently have at least one row."""
+        return self._facets.values(column)
+
+    def count(self, column: str, value) -> int:
+        return self._facets.count(column, value)
+
+    def facet_counts(self, column: str, **criteria) -> dict:
+        """Applicants per value of an indexed column, under every criterion except column's own."""
+        return self._facets.facet_counts(column, **criteria)
+
+    def column(self, name: str) -> np.ndarray:
+        return self._frame[name].to_numpy()
+
+    def score_bounds(self) -> tuple:
+        return self._facets.bounds("AI Score")
+
+    def mean_score(self) -> float:
+        return self._score_sum / len(self._frame) if len(self._frame) else float("nan")
+
+    def filter(self, countries=None, risk_bands=None, statuses=None, score_range=None, max_volatility=None) -> np.ndarray:
+        """Sorted positions of rows matching every given criterion (None means no constraint)."""
+        return self._facets.positions(
+            countries=countries, risk_bands=risk_bands, statuses=statuses,
+            score_range=score_range, max_volatility=max_volatility,
+        )
+
+    def frame(self, positions=None, columns=None) -> pd.DataFrame:
+        frame = self._frame if columns is None else self._frame[list(columns)]
+        return frame if positions is None else frame.iloc[positions]
+
+    def iter_frames(self, positions=None, chunksize: int = 100_000, columns=None):
+        """Yield the rows at positions (default: whole book) as frames of at most chunksize rows.
+
+        An empty selection yields one empty frame, so writers still see the columns.
+        """
+        if positions is None:
+            positions = np.arange(len(self._frame))
+        for start in range(0, max(len(positions), 1), chunksize):
+            yield self.frame(positions[start: start + chunksize], columns)
+
+    # ---------- sorted, paged views ----------
+    def order(self, sort_by: str = "ID", descending: bool = False) -> np.ndarray:
+        """Positions of the whole book sorted by sort_by, ties broken by ascending ID."""
+        key = (sort_by, descending)
+        order = self._orders.get(key)
+        if order is None:
+            values = self._frame[sort_by]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = pd.factorize(values, sort=True)[0]
+            values = np.asarray(values)
+            order = np.lexsort((self.column("ID"), -values if descending else values))
+            self._orders[key] = order
+        return order
+
+    def page(self, positions=None, number: int = 0, size: int = 25, sort_by: str = "ID",
+             descending: bool = False, columns=None) -> pd.DataFrame:
+        """Rows number*size .. (number+1)*size of positions (default: whole book) in sort order."""
+        order = self.order(sort_by, descending)
+        if positions is not None and len(positions) < len(order):
+            member = np.zeros(len(order), dtype=bool)
+            member[positions] = True
+            order = order[member[order]]
+        start = max(number, 0) * size
+        return self.frame(order[start: start + size], columns)
+
+    # ---------- writes ----------
+    def insert(self, borrowers: pd.DataFrame) -> None:
+        """Append applicants; their IDs must not already be in the store. Rebuilds the FacetIndex."""
+        borrowers = borrowers.copy()
+        if "Risk band" not in borrowers:
+            borrowers["Risk band"] = risk_band(borrowers["AI Score"].to_numpy())
+        with self._lock:
+            clash = [bid for bid in borrowers["ID"].tolist() if bid in self._by_id]
+            if clash:
+                raise ValueError(f"borrower IDs already exist: {clash[:5]}")
+            start = len(self._frame)
+            self._score_sum += int(borrowers["AI Score"].sum())
+            self._frame = pd.concat([self._frame, borrowers[BORROWER_COLUMNS]], ignore_index=True)
+            for pos in range(start, len(self._frame)):
+                self._by_id[self._frame.at[pos, "ID"]] = pos
+                self._by_name.setdefault(self._frame.at[pos, "Name"], pos)
+            self._facets.append(self._frame.iloc[start:])
+            self._orders = {}
+            self.version += 1
+
+    def set_status(self, borrower_id, status: str) -> None:
+        with self._lock:
+            pos = self._by_id[borrower_id]
+            old = self._frame.at[pos, "Status"]
+            if old == status:
+                return
+            self._facets.set(pos, "Status", old, status)
+            self._frame.at[pos, "Status"] = status
+            self._drop_orders("Status")
+            self.version += 1
+
+    def add_balance(self, borrower_id, column: str, amount) -> None:
+        if column not in BALANCE_COLUMNS:
+            raise ValueError(f"column must be one of {BALANCE_COLUMNS}")
+        with self._lock:
+            pos = self._by_id[borrower_id]
+            self._frame.at[pos, column] = self._frame.at[pos, column] + amount
+            self._drop_orders(column)
+            self.version += 1
+
+    def decide(self, borrower_id, status: str, balance_column=None, amount=0, expected_status=None) -> bool:
+        """Set status (and credit a balance) atomically; False if the status is no longer expected_status."""
+        with self._lock:
+            if expected_status is not None and self._frame.at[self._by_id[borrower_id], "Status"] != expected_status:
+                return False
+            self.set_status(borrower_id, status)
+            if balance_column is not None:
+                self.add_balance(borrower_id, balance_column, amount)
+            return True
+
+    def _drop_orders(self, column: str) -> None:
+        for descending in (False, True):
+            self._orders.pop((column, descending), None)
+
+
+_CRITERIA_KEYS = {"Country": "countries", "Risk band": "risk_bands", "Status": "statuses"}
+
+
+def _row_matches(row, status, countries=None, risk_bands=None, statuses=None, score_range=None, max_volatility=None) -> bool:
+    """Whether one row, taken with the given status, passes the filter criteria."""
+    return (
+        (statuses is None or status in statuses)
+        and (countries is None or row["Country"] in countries)
+        and (risk_bands is None or row["Risk band"] in risk_bands)
+        and (score_range is None or score_range[0] <= row["AI Score"] <= score_range[1])
+        and (max_volatility is None or row["Volatility"] <= max_volatility)
+    )
+
+
+class BorrowerOverlay:
+    """Copy-on-write view of a shared, read-only BorrowerStore snapshot.
+
+    Edits never touch the base: a status change is kept as the new value and a balance
+    change as a credit, per borrower ID. Reads merge base and delta, so a session costs
+    memory in proportion to the applicants it edited, not the size of the book.
+    commit() replays the delta onto the shared store; discard() drops it.
+    """
+
+    def __init__(self, base: BorrowerStore):
+        self.base = base
+        self._delta = {}
+        self._edits = 0
+
+    def rebase(self, base: BorrowerStore) -> None:
+        """Point the overlay at a newer snapshot; the delta is keyed by ID and carries over."""
+        self.base = base
+        for borrower_id, delta in self._delta.items():
+            delta["pos"] = base.position(borrower_id)
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    @property
+    def version(self) -> tuple:
+        return self.base.version, self._edits
+
+    @property
+    def pending(self) -> int:
+        return len(self._delta)
+
+    # ---------- merging ----------
+    def _merge(self, row):
+        delta = None if row is None else self._delta.get(row["ID"])
+        if not delta:
+            return row
+        row = dict(row)
+        row["Status"] = delta.get("Status", row["Status"])
+        for col in BALANCE_COLUMNS:
+            row[col] = row[col] + delta.get(col, 0)
+        return row
+
+    def _patch(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Apply the delta to a frame of base rows (indexed by base position)."""
+        edited = {delta["pos"]: delta for delta in self._delta.values()}
+        hits = frame.index[frame.index.isin(list(edited))]
+        if len(hits) == 0:
+            return frame
+        frame = frame.copy()
+        for pos in hits:
+            delta = edited[pos]
+            if "Status" in frame and "Status" in delta:
+                frame.at[pos, "Status"] = delta["Status"]
+            for col in BALANCE_COLUMNS:
+                if col in frame and col in delta:
+                    frame.at[pos, col] = frame.at[pos, col] + delta[col]
+        return frame
+
+    def _moved(self) -> dict:
+        """base position -> (base status, overlay status) for rows whose status differs."""
+        moved = {}
+        for delta in self._delta.values():
+            if "Status" in delta:
+                old = self.base.row(delta["pos"])["Status"]
+                if old != delta["Status"]:
+                    moved[delta["pos"]] = (old, delta["Status"])
+        return moved
+
+    # ---------- reads ----------
+    def get(self, borrower_id):
+        return self._merge(self.base.get(borrower_id))
+
+    def get_by_name(self, name: str):
+        return self._merge(self.base.get_by_name(name))
+
+    def count(self, column: str, value) -> int:
+        count = self.base.count(column, value)
+        if column == "Status":
+            for old, new in self._moved().values():
+                count += (new == value) - (old == value)
+        return count
+
+    def facet_counts(self, column: str, **criteria) -> dict:
+        counts = self.base.facet_counts(column, **criteria)
+        moved = self._moved()
+        if moved:
+            others = {**criteria, _CRITERIA_KEYS[column]: None}
+            for pos, (old, new) in moved.items():
+                row = self.base.row(pos)
+                for status, step in ((old, -1), (new, 1)):
+                    if _row_matches(row, status, **others):
+                        key = status if column == "Status" else row[column]
+                        counts[key] = counts.get(key, 0) + step
+        return {value: counts[value] for value in sorted(counts) if self.count(column, value)}
+
+    def values(self, column: str) -> list:
+        return list(self.facet_counts(column))
+
+    def score_bounds(self) -> tuple:
+        return self.base.score_bounds()
+
+    def mean_score(self) -> float:
+        return self.base.mean_score()
+
+    def filter(self, countries=None, risk_bands=None, statuses=None, score_range=None, max_volatility=None) -> np.ndarray:
+        positions = self.base.filter(countries, risk_bands, statuses, score_range, max_volatility)
+        moved = self._moved()
+        if statuses is None or not moved:
+            return positions
+        # re-test only the rows whose status the overlay changed
+        keep = positions[~np.isin(positions, list(moved))]
+        criteria = dict(
+            countries=countries, risk_bands=risk_bands, statuses=statuses,
+            score_range=score_range, max_volatility=max_volatility,
+        )
+        extra = [pos for pos, (_, status) in moved.items() if _row_matches(self.base.row(pos), status, **criteria)]
+        return np.union1d(keep, np.array(extra, dtype=np.int64))
+
+    def page(self, positions=None, number: int = 0, size: int = 25, sort_by: str = "ID",
+             descending: bool = False, columns=None) -> pd.DataFrame:
+        columns = list(columns or BORROWER_COLUMNS)
+        if not any(sort_by in delta for delta in self._delta.values()):
+            return self._patch(self.base.page(positions, number, size, sort_by, descending, columns))
+        # sorting on an edited column: order the candidates by their merged keys
+        if positions is None:
+            positions = np.arange(len(self.base))
+        keys = self._patch(self.base.frame(positions, [sort_by]))[sort_by]
+        if not pd.api.types.is_numeric_dtype(keys):
+            keys = pd.factorize(keys, sort=True)[0]
+        keys = np.asarray(keys)
+        order = np.lexsort((self.base.column("ID")[positions], -keys if descending else keys))
+        start = max(number, 0) * size
+        return self._patch(self.base.frame(positions[order[start: start + size]], columns))
+
+    def iter_frames(self, positions=None, chunksize: int = 100_000, columns=None):
+        for chunk in self.base.iter_frames(positions, chunksize, columns):
+            yield self._patch(chunk)
+
+    # ---------- writes (overlay only) ----------
+    def decide(self, borrower_id, status: str, balance_column=None, amount=0, expected_status=None) -> bool:
+        if balance_column is not None and balance_column not in BALANCE_COLUMNS:
+            raise ValueError(f"balance_column must be one of {BALANCE_COLUMNS}")
+        current = self.get(borrower_id)
+        if current is None:
+            raise KeyError(borrower_id)
+        if expected_status is not None and current["Status"] != expected_status:
+            return False
+        delta = self._edit(borrower_id)
+        delta["Status"] = status
+        if balance_column is not None:
+            delta[balance_column] = delta.get(balance_column, 0) + amount
+        self._edits += 1
+        return True
+
+    def _edit(self, borrower_id) -> dict:
+        """The delta entry for borrower_id, remembering the base status it was first made against."""
+        delta = self._delta.get(borrower_id)
+        if delta is None:
+            pos = self.base.position(borrower_id)
+            delta = self._delta[borrower_id] = {"pos": pos, "base_status": self.base.row(pos)["Status"]}
+        return delta
+
+    def set_status(self, borrower_id, status: str) -> None:
+        self.decide(borrower_id, status)
+
+    def add_balance(self, borrower_id, column: str, amount) -> None:
+        current = self.get(borrower_id)
+        if current is None:
+            raise KeyError(borrower_id)
+        if column not in BALANCE_COLUMNS:
+            raise ValueError(f"column must be one of {BALANCE_COLUMNS}")
+        delta = self._edit(borrower_id)
+        delta[column] = delta.get(column, 0) + amount
+        self._edits += 1
+
+    def changes(self) -> list:
+        """The delta as [{"ID", "Status", "Base status", "Wallet balance", "Bank balance"}], credits per balance.
+
+        "Base status" is the status the first edit was made against, so a commit can tell
+        whether someone else decided the application in the meantime.
+        """
+        changes = []
+        for borrower_id, delta in self._delta.items():
+            changes.append(
+                {
+                    "ID": borrower_id,
+                    "Status": delta.get("Status", delta["base_status"]),
+                    "Base status": delta["base_status"],
+                    **{col: delta.get(col, 0) for col in BALANCE_COLUMNS},
+                }
+            )
+        return changes
+
+    def discard(self) -> None:
+        self._delta = {}
+        self._edits += 1
+
+    def commit(self, target) -> list:
+        """Apply the delta to target (see SqliteBorrowerStore.apply_changes) in one transaction.
+
+        Returns the IDs whose shared status moved since the snapshot; in that case nothing
+        is written and the overlay is kept so the edits can be reviewed.
+        """
+        conflicts = target.apply_changes(self.changes())
+        if not conflicts:
+            self.discard()
+        return conflicts
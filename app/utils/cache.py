@@ -0,0 +1,92 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.data import normalize_columns
+from utils.scoring import compute_features
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Fast content hash of a frame: column names, dtypes and per-row hashes of the values."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU map with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        # compute outside the lock so slow keys don't block other sessions
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+class FeatureCache:
+    """Content-addressed cache around normalize_columns / compute_features.
+
+    Keys are frame fingerprints, so identical frames (e.g. on a Streamlit rerun) are only
+    processed once. The module-level `feature_cache` lives for the whole process, which
+    makes it shared across Streamlit reruns and sessions as well as batch scripts.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.features = LRUCache(maxsize)
+        self.normalized = LRUCache(maxsize)
+
+    def compute_features(self, transactions: pd.DataFrame) -> dict:
+        key = frame_fingerprint(transactions)
+        return dict(self.features.get_or_compute(key, lambda: compute_features(transactions)))
+
+    def normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        key = frame_fingerprint(df)
+        # normalize_columns may add missing columns in place, so hand it a copy
+        return self.normalized.get_or_compute(key, lambda: normalize_columns(df.copy())).copy()
+
+    def clear(self) -> None:
+        self.features.clear()
+        self.normalized.clear()
+
+    def stats(self) -> dict:
+        return {"features": self.features.stats(), "normalize": self.normalized.stats()}
+
+
+feature_cache = FeatureCache()
+
+
+def cached_compute_features(transactions: pd.DataFrame) -> dict:
+    return feature_cache.compute_features(transactions)
+
+
+def cached_normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    return feature_cache.normalize_columns(df)
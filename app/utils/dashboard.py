@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+import numpy as np
+
+from utils.rules import get_plan
+
+# What-if axes of the Scenario Sandbox (same ranges as its sliders)
+UTILIZATION_AXIS = np.arange(0, 101)
+VOLATILITY_AXIS = np.arange(0, 101)
+MISSED_PAYMENTS_AXIS = np.arange(0, 11)
+
+
+def recommended_limit(monthly_income, ai_score):
+    """Suggested BC limit: 1.5x income scaled by where the score sits in 300–900."""
+    limit_base = monthly_income * 1.5
+    return np.trunc(limit_base * ((np.asarray(ai_score) - 300) / 600)).astype(np.int64)
+
+
+def dashboard_score(profile: dict) -> dict:
+    """Score, risk band, impact labels and suggested limit for one Dashboard profile.
+
+    `profile` holds the dashboard inputs: monthly_income, income_volatility, utilization,
+    missed_payments, country_risk, months_history, accounts_linked, kyc_status.
+    """
+    scored = get_plan("dashboard_score").evaluate_one(**profile)
+    scored["limit"] = int(recommended_limit(profile["monthly_income"], scored["score"]))
+    return scored
+
+
+@lru_cache(maxsize=64)
+def _surface(plan, profile_items: tuple) -> dict:
+    # `plan` is part of the key so a hot-reloaded rule table gets fresh grids
+    profile = dict(profile_items)
+    util, vol, missed = np.meshgrid(UTILIZATION_AXIS, VOLATILITY_AXIS, MISSED_PAYMENTS_AXIS, indexing="ij")
+    inputs = dict(profile, utilization=util.ravel(), income_volatility=vol.ravel(), missed_payments=missed.ravel())
+    score = plan.evaluate(inputs)["score"].reshape(util.shape)
+    limit = recommended_limit(profile["monthly_income"], score)
+    for arr in (score, limit):
+        arr.setflags(write=False)  # shared between reruns/sessions via the cache
+    return {"score": score, "limit": limit}
+
+
+def whatif_surface(profile: dict) -> dict:
+    """Score and limit grids over (utilization, volatility, missed payments) for a profile.
+
+    Arrays are indexed [utilization, volatility, missed_payments] with the *_AXIS values,
+    so a slider move is a lookup: surface["score"][util, vol, missed]. Grids are computed
+    once per profile (the other inputs) and cached.
+    """
+    fixed = {k: v for k, v in profile.items() if k not in ("utilization", "income_volatility", "missed_payments")}
+    return _surface(get_plan("dashboard_score"), tuple(sorted(fixed.items())))
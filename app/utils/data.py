@@ -2,6 +2,8 @@ import pandas as pd
 from datetime import datetime
 import numpy as np
 
+from utils.dates import parse_dates
+
 def _month_anchor():
     # First day of the current month as a pandas Timestamp
     return pd.Timestamp.today().normalize().replace(day=1)
@@ -29,15 +31,206 @@ def sample_transactions_mobile_money():
         rows.append({"date": month_start + pd.Timedelta(days=14), "amount": 50.00,  "type": "inflow",  "category": "remittance_in"})
     return pd.DataFrame(rows)
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    expected = ["date", "amount", "type", "category"]
+# Event templates for generate_population: (type, category, day of month, share of income)
+_POPULATION_EVENTS = [
+    ("inflow",  "salary",        1,  1.00),
+    ("inflow",  "upwork_gig",    6,  0.90),
+    ("inflow",  "ecocash_gig",   9,  0.90),
+    ("inflow",  "remittance_in", 14, 0.08),
+    ("outflow", "rent",          3,  0.50),
+    ("outflow", "groceries",     10, 0.14),
+    ("outflow", "transport",     18, 0.07),
+    ("outflow", "wallet_spend",  4,  0.20),
+]
+
+def generate_population(
+    n_users: int,
+    months: int = 6,
+    seed: int | None = None,
+    income_mean: float = 900.0,
+    income_spread: float = 0.5,
+    volatility: tuple[float, float] = (0.0, 0.5),
+    expense_level: tuple[float, float] = (0.6, 1.1),
+    gig_share: float = 0.3,
+    remittance_share: float = 0.2,
+    mobile_money_share: float = 0.4,
+    noise: float = 0.05,
+) -> pd.DataFrame:
+    """Seeded synthetic book of `n_users` with `months` of history, built column-wise in NumPy.
+
+    Each user draws a base income (lognormal around `income_mean`), a month-to-month income
+    volatility and an expense level from the given ranges, and whether they earn gig income,
+    receive remittances or use mobile money. Rows follow the sample_transactions_* layout
+    (date, amount, type, category) plus `user_id`, contiguous per user, so the frame can go
+    straight into compute_features_batch or the chunked/parallel scorers.
+    """
+    rng = np.random.default_rng(seed)
+    base_income = income_mean * rng.lognormal(-income_spread**2 / 2, income_spread, n_users)
+    user_vol = rng.uniform(*volatility, n_users)
+    user_expense = rng.uniform(*expense_level, n_users)
+    is_gig = rng.random(n_users) < gig_share
+    is_remit = rng.random(n_users) < remittance_share
+    is_mm = rng.random(n_users) < mobile_money_share
+
+    # income per (user, month), scaled by each user's volatility
+    monthly_income = base_income[:, None] * np.clip(1 + user_vol[:, None] * rng.standard_normal((n_users, months)), 0, None)
+    month_starts = np.datetime64(_month_anchor().strftime("%Y-%m"), "M") - np.arange(months)
+
+    has_event = {
+        "salary": ~is_gig,
+        "upwork_gig": is_gig & ~is_mm,
+        "ecocash_gig": is_gig & is_mm,
+        "remittance_in": is_remit,
+        "rent": np.ones(n_users, dtype=bool),
+        "groceries": np.ones(n_users, dtype=bool),
+        "transport": ~is_mm,
+        "wallet_spend": is_mm,
+    }
+    types = np.array(["inflow", "outflow"])
+    categories = np.array([category for _, category, _, _ in _POPULATION_EVENTS])
+
+    users, dates, amounts, type_codes, cat_codes = [], [], [], [], []
+    for code, (tx_type, category, day, share) in enumerate(_POPULATION_EVENTS):
+        u = np.flatnonzero(has_event[category])
+        u_idx = np.repeat(u, months)
+        m_idx = np.tile(np.arange(months), len(u))
+        size = len(u_idx)
+        if tx_type == "inflow":
+            amount = monthly_income[u_idx, m_idx] * share
+        else:
+            amount = base_income[u_idx] * user_expense[u_idx] * share
+        amount = amount * (1 + noise * rng.standard_normal(size))
+        jitter = rng.integers(0, 3, size)
+
+        users.append(u_idx)
+        dates.append(month_starts[m_idx].astype("datetime64[D]") + (day - 1) + jitter)
+        amounts.append(np.round(np.clip(amount, 0, None), 2))
+        type_codes.append(np.full(size, int(tx_type == "outflow"), dtype=np.int8))
+        cat_codes.append(np.full(size, code, dtype=np.int8))
+
+    users = np.concatenate(users)
+    order = np.argsort(users, kind="stable")
+    return pd.DataFrame(
+        {
+            "user_id": users[order],
+            "date": np.concatenate(dates)[order].astype("datetime64[ns]"),
+            "amount": np.concatenate(amounts)[order],
+            "type": pd.Categorical.from_codes(np.concatenate(type_codes)[order], types),
+            "category": pd.Categorical.from_codes(np.concatenate(cat_codes)[order], categories),
+        }
+    )
+
+NORMALIZED_COLUMNS = ["date", "amount", "type", "category"]
+
+def is_normalized(df: pd.DataFrame) -> bool:
+    """True for frames produced by normalize_columns (marker set and dtypes still intact)."""
+    return (
+        df.attrs.get("normalized", False)
+        and list(df.columns) == NORMALIZED_COLUMNS
+        and pd.api.types.is_datetime64_dtype(df["date"])
+        and pd.api.types.is_numeric_dtype(df["amount"])
+        and df["type"].dtype == object
+        and df["category"].dtype == object
+    )
+
+def _is_str_column(col: pd.Series) -> bool:
+    return col.dtype == object and pd.api.types.infer_dtype(col, skipna=False) == "string"
+
+def normalize_columns(df: pd.DataFrame, source: str | None = None) -> pd.DataFrame:
+    # fast path: already normalized, nothing to copy or convert
+    if is_normalized(df):
+        return df
+    expected = NORMALIZED_COLUMNS
     for col in expected:
         if col not in df.columns:
             df[col] = None
-    df = df[expected].copy()
-    # ensure types are consistent
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
-    df["type"] = df["type"].astype(str)
-    df["category"] = df["category"].astype(str)
+    df = df[expected].copy(deep=False)  # list selection already copied the data
+    # ensure types are consistent, converting only columns that are not already
+    if not pd.api.types.is_datetime64_dtype(df["date"]):
+        df["date"] = parse_dates(df["date"], source=source)
+    if not pd.api.types.is_numeric_dtype(df["amount"]):
+        df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+    if not _is_str_column(df["type"]):
+        df["type"] = df["type"].astype(str)
+    if not _is_str_column(df["category"]):
+        df["category"] = df["category"].astype(str)
+    df.attrs["normalized"] = True
     return df
+
+# ---------- Compact transaction layout ----------
+# day (int32 days since epoch), amount_minor (int64 cents) or amount (float32),
+# type_code (int8) and a dictionary-encoded category: ~15 bytes/row instead of 100+.
+TYPE_CODES = {"inflow": 0, "outflow": 1}
+OTHER_TYPE_CODE = -1
+MISSING_DAY = np.iinfo(np.int32).min
+MISSING_MINOR = np.iinfo(np.int64).min
+
+def is_compact(df: pd.DataFrame) -> bool:
+    return "day" in df.columns and "type_code" in df.columns
+
+def to_compact(df: pd.DataFrame, amount_dtype: str = "int64") -> pd.DataFrame:
+    """Convert a date/amount/type/category frame to the compact layout.
+
+    amount_dtype="int64" stores exact minor units (cents); "float32" keeps a float column.
+    Types other than inflow/outflow collapse to OTHER_TYPE_CODE.
+    """
+    df = normalize_columns(df.copy())
+    dates = df["date"].to_numpy(dtype="datetime64[D]")
+    day = np.where(np.isnat(dates), MISSING_DAY, dates.astype(np.int64)).astype(np.int32)
+    type_code = (
+        df["type"].str.lower().map(TYPE_CODES).fillna(OTHER_TYPE_CODE).astype(np.int8)
+    )
+    out = pd.DataFrame({"day": day}, index=df.index)
+    if amount_dtype == "float32":
+        out["amount"] = df["amount"].astype(np.float32)
+    else:
+        amount = df["amount"].to_numpy(dtype=float)
+        out["amount_minor"] = np.where(
+            np.isnan(amount), MISSING_MINOR, np.rint(np.nan_to_num(amount) * 100)
+        ).astype(np.int64)
+    out["type_code"] = type_code.to_numpy()
+    out["category"] = df["category"].astype("category")
+    return out
+
+def compact_dates(df: pd.DataFrame) -> pd.Series:
+    day = df["day"].to_numpy()
+    dates = np.where(day == MISSING_DAY, np.datetime64("NaT"), day.astype("datetime64[D]"))
+    return pd.Series(dates.astype("datetime64[s]"), index=df.index)
+
+def compact_amounts(df: pd.DataFrame) -> pd.Series:
+    if "amount_minor" in df.columns:
+        minor = df["amount_minor"].to_numpy()
+        amount = np.where(minor == MISSING_MINOR, np.nan, minor / 100.0)
+    else:
+        amount = df["amount"].to_numpy(dtype=float)
+    return pd.Series(amount, index=df.index)
+
+def from_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Back to the normalize_columns schema (other type codes come back as 'other')."""
+    names = {code: name for name, code in TYPE_CODES.items()}
+    return pd.DataFrame(
+        {
+            "date": compact_dates(df).astype("datetime64[ns]"),
+            "amount": compact_amounts(df),
+            "type": [names.get(code, "other") for code in df["type_code"].tolist()],
+            "category": df["category"].astype(str),
+        },
+        index=df.index,
+    )
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column and per row for the normalized vs compact layouts of `df`."""
+    normalized = normalize_columns(df.copy())
+    compact = to_compact(normalized)
+    rows = max(len(df), 1)
+    report = pd.DataFrame(
+        {
+            "normalized_bytes": normalized.memory_usage(index=False, deep=True).sum(),
+            "compact_bytes": compact.memory_usage(index=False, deep=True).sum(),
+        },
+        index=["total"],
+    )
+    report["normalized_bytes_per_row"] = report["normalized_bytes"] / rows
+    report["compact_bytes_per_row"] = report["compact_bytes"] / rows
+    report["savings"] = 1 - report["compact_bytes"] / report["normalized_bytes"]
+    return report
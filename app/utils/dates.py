@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Tried in order; on a tie (e.g. 03/04/2025) the earlier format wins, so ambiguous
+# slashed dates read month-first like pandas unless a source template says otherwise.
+CANDIDATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y%m%d",
+    "%d %b %Y",
+    "%b %d, %Y",
+]
+
+# Day-first formats that lose a tie to an earlier month-first one in CANDIDATE_FORMATS.
+DAY_FIRST_TIES = {"%d/%m/%Y"}
+
+SNIFF_SAMPLE = 200
+MIN_PARSE_RATE = 0.95
+
+
+def sniff_format(values: pd.Series, sample_size: int = SNIFF_SAMPLE) -> str | None:
+    """Best explicit format for a sample of date strings, or None if none parses reliably."""
+    sample = pd.Series(values).dropna().astype(str).head(sample_size)
+    if sample.empty:
+        return None
+    best, best_rate = None, 0.0
+    for fmt in CANDIDATE_FORMATS:
+        rate = pd.to_datetime(sample, format=fmt, errors="coerce").notna().mean()
+        if rate > best_rate:
+            best, best_rate = fmt, rate
+        if rate == 1.0:
+            break
+    return best if best_rate >= MIN_PARSE_RATE else None
+
+
+class DateParser:
+    """Parses statement dates with an explicit format, sniffed once per source template.
+
+    `source` is any key naming a statement layout ("bank", "ecocash", "momo", ...); its
+    format is remembered after the first call. Calls without a source reuse the last format
+    they sniffed only where a fresh sniff would choose it too, so their results never depend
+    on what was parsed before. Columns with many repeated strings are parsed once per
+    unique value and broadcast back by code.
+    """
+
+    def __init__(self):
+        self.formats = {}
+        self._lock = threading.Lock()
+
+    def parse(self, values, source: str | None = None) -> pd.Series:
+        values = pd.Series(values)
+        if pd.api.types.is_datetime64_dtype(values):
+            return values
+        if values.dtype != object:
+            return pd.to_datetime(values, errors="coerce")
+
+        with self._lock:
+            fmt = self.formats.get(source)
+        if source is None and fmt is not None:
+            # Only kept when sniffing this column would pick the same format: it must parse every
+            # value, and a day-first match must not also read month-first across the sniff sample.
+            parsed = self._parse_unique(values, fmt)
+            present = values.notna()
+            if parsed[present].notna().all() and not (
+                fmt in DAY_FIRST_TIES and (parsed[present].head(SNIFF_SAMPLE).dt.day <= 12).all()
+            ):
+                return parsed
+            fmt = None
+        if fmt is None:
+            fmt = sniff_format(values)
+            if fmt is not None:
+                with self._lock:
+                    self.formats[source] = fmt
+
+        parsed = self._parse_unique(values, fmt)
+        if fmt is not None and source is not None and parsed.isna().all() and values.notna().any():
+            # template changed under this source: forget it and sniff again
+            with self._lock:
+                self.formats.pop(source, None)
+            fmt = sniff_format(values)
+            parsed = self._parse_unique(values, fmt)
+        return parsed
+
+    @staticmethod
+    def _parse_unique(values: pd.Series, fmt: str | None) -> pd.Series:
+        codes, uniques = pd.factorize(values)
+        if len(uniques) > len(values) // 2:
+            return pd.to_datetime(values, format=fmt, errors="coerce")
+        parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=fmt, errors="coerce").to_numpy()
+        dates = np.append(parsed, np.datetime64("NaT", "ns"))[codes]  # code -1 -> NaT
+        return pd.Series(dates, index=values.index, name=values.name)
+
+
+date_parser = DateParser()
+
+
+def parse_dates(values, source: str | None = None) -> pd.Series:
+    return date_parser.parse(values, source=source)
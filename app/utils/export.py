@@ -0,0 +1,90 @@
+import gzip
+import os
+import tempfile
+import weakref
+from typing import Iterable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def write_csv_gzip(frames: Iterable[pd.DataFrame], dest) -> int:
+    """Stream frames into a gzip CSV at dest (path or binary file); returns rows written.
+
+    The header comes from the first frame, so an empty leading frame still writes it.
+    """
+    rows = 0
+    header = True
+    with gzip.open(dest, "wb", compresslevel=6) as out:
+        for chunk in frames:
+            out.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+            header = False
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(frames: Iterable[pd.DataFrame], dest) -> int:
+    """Stream frames into one Parquet file at dest, a row group per frame; returns rows written.
+
+    Empty frames only fix the schema; with no frames at all an empty, schemaless file is written.
+    """
+    rows = 0
+    writer = None
+    try:
+        for chunk in frames:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(dest, table.schema, compression="zstd")
+            if len(chunk):
+                writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+        if writer is None:
+            writer = pq.ParquetWriter(dest, pa.schema([]), compression="zstd")
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_export(frames: Iterable[pd.DataFrame], dest, fmt: str = "csv.gz") -> int:
+    """Write an iterator of frames as `fmt` (see EXPORT_FORMATS) without holding them all."""
+    if fmt == "csv.gz":
+        return write_csv_gzip(frames, dest)
+    if fmt == "parquet":
+        return write_parquet(frames, dest)
+    raise ValueError(f"fmt must be one of {list(EXPORT_FORMATS)}")
+
+
+class ExportFile:
+    """An export written to a temp file, deleted by remove(), garbage collection or interpreter exit.
+
+    Keep it in a session's state and the file goes away when the session does.
+    """
+
+    def __init__(self, frames: Iterable[pd.DataFrame], fmt: str = "csv.gz"):
+        ext, self.mime = EXPORT_FORMATS[fmt]
+        fd, self.path = tempfile.mkstemp(prefix="bc_export_", suffix=f".{ext}")
+        os.close(fd)
+        self._cleanup = weakref.finalize(self, _remove, self.path)
+        try:
+            self.rows = write_export(frames, self.path, fmt)
+        except BaseException:
+            self.remove()
+            raise
+
+    def remove(self) -> None:
+        self._cleanup()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
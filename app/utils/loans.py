@@ -0,0 +1,310 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.rules import get_plan
+
+# Repayment frequency -> (weeks per period, period label used in schedules)
+FREQUENCIES = {
+    "Weekly": (1, "Week"),
+    "Bi-Weekly": (2, "Bi-week"),
+    "Monthly": (4, "Month"),
+}
+INTEREST_METHODS = ("simple", "declining")
+
+
+def num_payments(duration_weeks, frequency) -> np.ndarray:
+    """Number of instalments per loan, as on the Microloan page (Monthly rounds weeks / 4)."""
+    weeks = np.asarray(duration_weeks)
+    freq = np.asarray(frequency)
+    n = np.select(
+        [freq == "Weekly", freq == "Bi-Weekly"],
+        [weeks, weeks // 2],
+        np.round(weeks / 4),
+    )
+    return np.maximum(1, n).astype(np.int64)
+
+
+def build_schedules(principal, apr, duration_weeks, frequency, method: str = "simple") -> dict:
+    """Repayment schedules for a batch of loans as (loan x period) arrays.
+
+    All inputs broadcast against each other. `method="simple"` is the Microloan page's
+    flat simple interest (APR x term, spread evenly); `"declining"` amortizes at the
+    periodic rate with a level instalment. Periods past a loan's last instalment are 0.
+
+    Returns 1-D `n_payments`, `total_interest`, `total_repay`, `payment_per` and 2-D
+    `principal`, `interest`, `payment`, `balance` and `due_day` (days after the start).
+    """
+    if method not in INTEREST_METHODS:
+        raise ValueError(f"method must be one of {INTEREST_METHODS}, got {method!r}")
+    principal, apr, weeks, freq = np.broadcast_arrays(
+        np.asarray(principal, dtype=float), np.asarray(apr, dtype=float), np.asarray(duration_weeks), np.asarray(frequency)
+    )
+    principal, apr, weeks, freq = (a.ravel() for a in (principal, apr, weeks, freq))
+
+    n = num_payments(weeks, freq)
+    n_max = int(n.max()) if len(n) else 0
+    k = np.arange(1, n_max + 1)[None, :]  # instalment number
+    active = k <= n[:, None]
+    period_weeks = np.select([freq == "Weekly", freq == "Bi-Weekly"], [1, 2], 4)
+
+    if method == "simple":
+        total_interest = principal * (apr / 100) * (weeks / 52)
+        principal_per = principal / n
+        interest_per = total_interest / n
+        # remaining balance by repeated subtraction, like the page's per-period loop
+        steps = np.concatenate([principal[:, None], np.repeat(principal_per[:, None], n_max, axis=1)], axis=1)
+        remaining = np.maximum(0, np.subtract.accumulate(steps, axis=1))
+        prev_balance, balance = remaining[:, :-1], remaining[:, 1:]
+        principal_k = np.where(prev_balance > 0, np.minimum(principal_per[:, None], prev_balance), 0)
+        interest_k = np.broadcast_to(interest_per[:, None], balance.shape)
+        payment_per = (principal + total_interest) / n
+    else:
+        rate = (apr / 100) * (period_weeks / 52)
+        growth = (1 + rate)[:, None] ** k
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payment_per = np.where(rate > 0, principal * rate / (1 - (1 + rate) ** -n), principal / n)
+            balance = np.where(
+                rate[:, None] > 0,
+                principal[:, None] * growth - payment_per[:, None] * (growth - 1) / rate[:, None],
+                principal[:, None] - k * (principal / n)[:, None],
+            )
+        balance = np.where(k == n[:, None], 0, np.maximum(0, balance))  # no float residue after the last instalment
+        prev_balance = np.concatenate([principal[:, None], balance[:, :-1]], axis=1)
+        interest_k = prev_balance * rate[:, None]
+        principal_k = prev_balance - balance
+        total_interest = np.where(active, interest_k, 0).sum(axis=1)
+
+    principal_k = np.where(active, principal_k, 0)
+    interest_k = np.where(active, interest_k, 0)
+    period_days = period_weeks * 7
+    return {
+        "n_payments": n,
+        "total_interest": total_interest,
+        "total_repay": principal + total_interest,
+        "payment_per": payment_per,
+        "principal": principal_k,
+        "interest": interest_k,
+        "payment": principal_k + interest_k,
+        "balance": np.where(active, balance, 0),
+        "due_day": np.where(active, k * period_days[:, None], -1),
+    }
+
+
+def _round2(values) -> list:
+    # builtin round() to keep the page's cent rounding
+    return [round(float(v), 2) for v in values]
+
+
+def schedule_frame(schedules: dict, period_label: str, loan: int = 0) -> pd.DataFrame:
+    """One loan's schedule in the Microloan page's table layout."""
+    n = int(schedules["n_payments"][loan])
+    i = np.arange(1, n + 1)
+    return pd.DataFrame(
+        {
+            "#": i,
+            "Period": [f"{period_label} {j}" for j in i],
+            "Principal": _round2(schedules["principal"][loan, :n]),
+            "Interest": _round2(schedules["interest"][loan, :n]),
+            "Total payment": _round2(schedules["payment"][loan, :n]),
+            "Remaining balance": _round2(schedules["balance"][loan, :n]),
+        }
+    )
+
+
+def _sum_by_period(days: np.ndarray, amounts: np.ndarray, freq: str) -> pd.Series:
+    """Sum amounts per calendar day/week/month with one bincount; `days` are days since epoch."""
+    if freq == "D":
+        bucket = days
+    elif freq == "W":
+        bucket = (days + 3) // 7  # Monday-start weeks (1970-01-01 was a Thursday)
+    elif freq == "M":
+        bucket = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    else:
+        raise ValueError(f"freq must be 'D', 'W' or 'M', got {freq!r}")
+    if len(bucket) == 0:
+        return pd.Series(dtype=float, index=pd.PeriodIndex([], freq=freq))
+    lo = int(bucket.min())
+    totals = np.bincount(bucket - lo, weights=amounts)
+    first_day = {"D": lo, "W": lo * 7 - 3}.get(freq)
+    start = np.datetime64(lo, "M") if freq == "M" else np.datetime64(first_day, "D")
+    return pd.Series(totals, index=pd.period_range(pd.Timestamp(start), periods=len(totals), freq=freq))
+
+
+def project_cash_flows(schedules: dict, start_dates, freq: str = "W") -> pd.Series:
+    """Expected repayments across all loans, summed per day ("D"), week ("W") or month ("M")."""
+    start = pd.to_datetime(np.asarray(start_dates)).to_numpy().astype("datetime64[D]").astype(np.int64)
+    due = schedules["due_day"]
+    mask = due >= 0
+    days = np.broadcast_to(start[:, None], due.shape)[mask] + due[mask]
+    return _sum_by_period(days, schedules["payment"][mask], freq)
+
+
+class LoanLedger:
+    """Accepted loans as growable NumPy columns, with a vectorized cash-flow projection.
+
+    Columns: principal, apr, start_day (days since epoch), duration_weeks, frequency and
+    method codes. Schedules for the whole book are rebuilt lazily in one
+    build_schedules call per interest method and reused until the next insert.
+    """
+
+    _FREQUENCY_NAMES = np.array(list(FREQUENCIES))
+
+    def __init__(self, capacity: int = 1024):
+        self._n = 0
+        self._cols = {
+            "principal": np.zeros(capacity, dtype=np.float64),
+            "apr": np.zeros(capacity, dtype=np.float64),
+            "start_day": np.zeros(capacity, dtype=np.int64),
+            "duration_weeks": np.zeros(capacity, dtype=np.int16),
+            "frequency": np.zeros(capacity, dtype=np.int8),
+            "method": np.zeros(capacity, dtype=np.int8),
+        }
+        self._schedules = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._cols["principal"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self._cols.items():
+            grown = np.zeros(capacity, dtype=col.dtype)
+            grown[: self._n] = col[: self._n]
+            self._cols[name] = grown
+
+    def add_many(self, principal, apr, duration_weeks, frequency, start_date=None, method="simple") -> np.ndarray:
+        """Append a batch of loans (inputs broadcast); returns their loan ids (row numbers)."""
+        if start_date is None:
+            start_date = pd.Timestamp.today().normalize()
+        start_day = pd.to_datetime(np.atleast_1d(np.asarray(start_date))).to_numpy().astype("datetime64[D]").astype(np.int64)
+        freq_codes = pd.Index(list(FREQUENCIES)).get_indexer(np.atleast_1d(np.asarray(frequency)))
+        if (freq_codes < 0).any():
+            raise ValueError(f"frequency must be one of {list(FREQUENCIES)}")
+        method_codes = pd.Index(list(INTEREST_METHODS)).get_indexer(np.atleast_1d(np.asarray(method)))
+        if (method_codes < 0).any():
+            raise ValueError(f"method must be one of {INTEREST_METHODS}")
+        values = np.broadcast_arrays(
+            np.atleast_1d(principal), np.atleast_1d(apr), start_day,
+            np.atleast_1d(duration_weeks), freq_codes, method_codes,
+        )
+        with self._lock:
+            lo, hi = self._n, self._n + len(values[0])
+            self._grow(hi)
+            for col, value in zip(self._cols.values(), values):
+                col[lo:hi] = value
+            self._n = hi
+            self._schedules = None
+        return np.arange(lo, hi)
+
+    def add(self, principal, apr, duration_weeks, frequency, start_date=None, method="simple") -> int:
+        return int(self.add_many(principal, apr, duration_weeks, frequency, start_date, method)[0])
+
+    def column(self, name: str) -> np.ndarray:
+        return self._cols[name][: self._n]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "principal": self.column("principal"),
+                "apr": self.column("apr"),
+                "start_date": self.column("start_day").astype("datetime64[D]"),
+                "duration_weeks": self.column("duration_weeks"),
+                "frequency": self._FREQUENCY_NAMES[self.column("frequency")],
+                "method": np.array(INTEREST_METHODS)[self.column("method")],
+            }
+        )
+
+    def _cash_flows(self):
+        """(due day, amount) of every instalment in the book, cached until the next insert."""
+        with self._lock:
+            if self._schedules is None:
+                days, amounts = [], []
+                method = self.column("method")
+                for code, name in enumerate(INTEREST_METHODS):
+                    rows = np.flatnonzero(method == code)
+                    if len(rows) == 0:
+                        continue
+                    sched = build_schedules(
+                        self.column("principal")[rows],
+                        self.column("apr")[rows],
+                        self.column("duration_weeks")[rows],
+                        self._FREQUENCY_NAMES[self.column("frequency")[rows]],
+                        method=name,
+                    )
+                    mask = sched["due_day"] >= 0
+                    days.append((self.column("start_day")[rows, None] + sched["due_day"])[mask])
+                    amounts.append(sched["payment"][mask])
+                self._schedules = (
+                    np.concatenate(days) if days else np.zeros(0, dtype=np.int64),
+                    np.concatenate(amounts) if amounts else np.zeros(0),
+                )
+            return self._schedules
+
+    def project(self, freq: str = "W", start=None, end=None) -> pd.Series:
+        """Expected inflows per day/week/month across the book, optionally within [start, end)."""
+        days, amounts = self._cash_flows()
+        if start is not None or end is not None:
+            keep = np.ones(len(days), dtype=bool)
+            if start is not None:
+                keep &= days >= pd.Timestamp(start).to_datetime64().astype("datetime64[D]").astype(np.int64)
+            if end is not None:
+                keep &= days < pd.Timestamp(end).to_datetime64().astype("datetime64[D]").astype(np.int64)
+            days, amounts = days[keep], amounts[keep]
+        return _sum_by_period(days, amounts, freq)
+
+
+loan_ledger = LoanLedger()
+
+
+# Offer-matrix grid (matches the Microloan sliders)
+OFFER_AMOUNTS = np.arange(20, 801, 10)
+OFFER_DURATIONS = np.arange(2, 25)
+
+
+@lru_cache(maxsize=256)
+def _offer_matrix(ai_score, volatility, method: str, plans: tuple) -> pd.DataFrame:
+    decision_plan, apr_plan, max_offer_plan = plans
+    decision = decision_plan.evaluate_one(ai_score=ai_score, volatility=volatility)
+    apr = apr_plan.evaluate_one(ai_score=ai_score, volatility=volatility)["score"]
+    max_offer = max_offer_plan.evaluate_one(final_score=decision["score"])["score"]
+
+    amount, weeks, freq = (
+        a.ravel() for a in np.meshgrid(OFFER_AMOUNTS, OFFER_DURATIONS, np.array(list(FREQUENCIES)), indexing="ij")
+    )
+    approved = np.clip(np.minimum(amount, max_offer), 0, None)
+    if decision["band"] == "Declined":
+        approved = np.zeros_like(approved)
+    schedules = build_schedules(approved, apr, weeks, freq, method=method)
+
+    matrix = pd.DataFrame(
+        {
+            "Amount requested": amount,
+            "Duration (weeks)": weeks,
+            "Frequency": freq,
+            "Decision": decision["band"],
+            "APR": apr,
+            "Max offer": max_offer,
+            "Approved amount": approved,
+            "Payments": schedules["n_payments"],
+            "Payment per period": schedules["payment_per"],
+            "Total to repay": schedules["total_repay"],
+        }
+    )
+    return matrix
+
+
+def offer_matrix(ai_score, volatility, method: str = "simple") -> pd.DataFrame:
+    """Decision, APR, max offer and payment for every (amount, duration, frequency) on the sliders.
+
+    One vectorized evaluation over OFFER_AMOUNTS x OFFER_DURATIONS x FREQUENCIES, cached per
+    (ai_score, volatility, method) and rule-table version.
+    """
+    plans = tuple(get_plan(name) for name in ("microloan_decision", "microloan_apr", "microloan_max_offer"))
+    return _offer_matrix(ai_score, volatility, method, plans).copy()  # cached frame stays pristine
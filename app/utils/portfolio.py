@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.dates import parse_dates
+from utils.scoring import FEATURE_COLUMNS, compute_features_batch, rule_based_score_batch
+
+
+def _to_shards(df: pd.DataFrame, user_col: str, chunk_size: int):
+    """Encode the frame as numpy columns and cut it into contiguous blocks of `chunk_size` users."""
+    user_codes, users = pd.factorize(df[user_col])
+    keep = user_codes >= 0
+    order = np.argsort(user_codes[keep], kind="stable")
+
+    user_codes = user_codes[keep][order]
+    dates = parse_dates(df["date"]).to_numpy()[keep][order]
+    amounts = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float)[keep][order]
+    type_codes, type_values = pd.factorize(df["type"].astype(str).str.lower())
+    categories = df["category"] if "category" in df.columns else pd.Series("", index=df.index)
+    cat_codes, cat_values = pd.factorize(categories.astype(str))
+    type_codes = type_codes[keep][order]
+    cat_codes = cat_codes[keep][order]
+    type_values, cat_values = list(type_values), list(cat_values)
+
+    bounds = np.searchsorted(user_codes, np.arange(0, len(users) + chunk_size, chunk_size))
+    shards = [
+        {
+            "user": user_codes[lo:hi],
+            "date": dates[lo:hi],
+            "amount": amounts[lo:hi],
+            "type_codes": type_codes[lo:hi],
+            "type_values": type_values,
+            "category_codes": cat_codes[lo:hi],
+            "category_values": cat_values,
+        }
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+        if hi > lo
+    ]
+    return shards, users
+
+
+def _score_shard(shard: dict) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "user_id": shard["user"],
+            "date": shard["date"],
+            "amount": shard["amount"],
+            "type": pd.Categorical.from_codes(shard["type_codes"], shard["type_values"]),
+            "category": pd.Categorical.from_codes(shard["category_codes"], shard["category_values"]),
+        }
+    )
+    feats = compute_features_batch(df, user_col="user_id")
+    return feats.join(rule_based_score_batch(feats))
+
+
+def score_portfolio(
+    df: pd.DataFrame,
+    user_col: str = "user_id",
+    workers: int | None = None,
+    chunk_size: int = 50_000,
+) -> pd.DataFrame:
+    """Features plus score/band for every user, computed across a process pool.
+
+    Transactions are sharded by user into blocks of `chunk_size` users and shipped to the
+    workers as plain numpy columns (no pickled DataFrames). Results come back in user
+    order of first appearance, same as compute_features_batch. `workers=1` runs inline.
+    """
+    columns = FEATURE_COLUMNS + ["score", "band"]
+    if df.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name=user_col))
+
+    workers = workers or os.cpu_count() or 1
+    shards, users = _to_shards(df, user_col, chunk_size)
+
+    if workers == 1 or len(shards) == 1:
+        parts = [_score_shard(s) for s in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            parts = list(pool.map(_score_shard, shards))
+
+    result = pd.concat(parts)
+    result.index = pd.Index(users[result.index.to_numpy()], name=user_col)
+    return result[columns]
@@ -0,0 +1,203 @@
+import json
+import logging
+import operator
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "scoring_rules.json")
+RELOAD_INTERVAL = 1.0  # seconds between checks of the rules file's mtime
+
+logger = logging.getLogger(__name__)
+
+_OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class _Rule:
+    """One row of a rule table, compiled to NumPy.
+
+    Either `when`: ordered [op, threshold, points(, label)] conditions, first match wins
+    (the if/elif chains this replaces), with `else` / `else_label` as fallback;
+    or `per`: linear points = ((clip(x, min, max) - offset) / scale) * per, optionally
+    clamped to [min_points, max_points].
+    """
+
+    def __init__(self, spec: dict):
+        self.feature = spec["feature"]
+        self.name = spec.get("name", self.feature)
+        self.when = [(_OPS[c[0]], c[1], c[2], c[3] if len(c) > 3 else None) for c in spec.get("when", [])]
+        self.else_points = spec.get("else", 0)
+        self.else_label = spec.get("else_label")
+        self.has_labels = self.else_label is not None or any(label is not None for *_, label in self.when)
+        self.linear = "per" in spec
+        self.per = spec.get("per", 1)
+        self.offset = spec.get("offset", 0)
+        self.scale = spec.get("scale", 1)
+        self.x_min, self.x_max = spec.get("min"), spec.get("max")
+        self.min_points, self.max_points = spec.get("min_points"), spec.get("max_points")
+
+    def evaluate_scalar(self, x):
+        if self.linear:
+            if self.x_min is not None:
+                x = max(x, self.x_min)
+            if self.x_max is not None:
+                x = min(x, self.x_max)
+            points = ((x - self.offset) / self.scale if self.offset or self.scale != 1 else x) * self.per
+            if self.min_points is not None:
+                points = max(points, self.min_points)
+            if self.max_points is not None:
+                points = min(points, self.max_points)
+            return points, None
+        for op, threshold, points, label in self.when:
+            if op(x, threshold):
+                return points, (label or "") if self.has_labels else None
+        return self.else_points, (self.else_label or "") if self.has_labels else None
+
+    def evaluate(self, x: np.ndarray):
+        if self.linear:
+            if self.x_min is not None or self.x_max is not None:
+                x = np.clip(x, self.x_min, self.x_max)
+            if self.offset:
+                x = x - self.offset
+            if self.scale != 1:
+                x = x / self.scale
+            points = x * self.per
+            if self.min_points is not None or self.max_points is not None:
+                points = np.clip(points, self.min_points, self.max_points)
+            return points, None
+
+        conditions = [op(x, threshold) for op, threshold, _, _ in self.when]
+        points = np.select(conditions, [p for _, _, p, _ in self.when], self.else_points)
+        labels = None
+        if self.has_labels:
+            labels = np.select(conditions, [label or "" for *_, label in self.when], self.else_label or "")
+        return points, labels
+
+
+class RulePlan:
+    """A compiled rule table: base + sum of rule points, optional clip/int, optional bands."""
+
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.base = spec.get("base", 0)
+        self.rules = [_Rule(r) for r in spec["rules"]]
+        self.clip = spec.get("clip")
+        self.integer = spec.get("integer", False)
+        self.bands = [(_OPS[op], threshold, band) for op, threshold, band in spec.get("bands", [])]
+        self.default_band = spec.get("default_band")
+        self.features = sorted({r.feature for r in self.rules})
+
+    def evaluate(self, inputs) -> dict:
+        """Score every row of `inputs` (DataFrame, dict of arrays or dict of scalars).
+
+        Returns arrays: `score`, `band` (if the table has bands) and `<rule name>` labels
+        for rules that carry impact labels.
+        """
+        columns = {f: np.atleast_1d(np.asarray(inputs[f])) for f in self.features}
+        n = max(len(v) for v in columns.values())
+        score = np.full(n, self.base, dtype=float)
+        out = {}
+        for rule in self.rules:
+            points, labels = rule.evaluate(columns[rule.feature])
+            score = score + points
+            if labels is not None:
+                out[rule.name] = labels
+        if self.clip is not None:
+            score = np.clip(score, self.clip[0], self.clip[1])
+        if self.integer:
+            score = score.astype(np.int64)
+        out["score"] = score
+        if self.bands:
+            out["band"] = np.select([op(score, t) for op, t, _ in self.bands], [b for *_, b in self.bands], self.default_band)
+        return out
+
+    def evaluate_frame(self, inputs) -> pd.DataFrame:
+        index = inputs.index if isinstance(inputs, pd.DataFrame) else None
+        return pd.DataFrame(self.evaluate(inputs), index=index)
+
+    def evaluate_one(self, **inputs) -> dict:
+        """Single profile in plain Python (no array overhead); same keys and results as evaluate()."""
+        score = self.base
+        out = {}
+        for rule in self.rules:
+            points, label = rule.evaluate_scalar(inputs[rule.feature])
+            score = score + points
+            if label is not None:
+                out[rule.name] = label
+        if self.clip is not None:
+            lo, hi = self.clip
+            score = score if lo is None else max(score, lo)
+            score = score if hi is None else min(score, hi)
+        out["score"] = int(score) if self.integer else float(score)
+        if self.bands:
+            out["band"] = next((b for op, t, b in self.bands if op(out["score"], t)), self.default_band)
+        return out
+
+
+class RuleBook:
+    """Rule tables loaded from a JSON file, compiled once and hot-reloaded when the file changes.
+
+    The file is stat'ed at most once per `reload_interval` seconds; in between, compiled
+    plans are returned without taking the lock. A changed file is parsed and every table
+    compiled before it replaces the current plans; if that fails the error is logged and
+    the last good plans keep serving (only the first load raises).
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, reload_interval: float = RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._next_check = 0.0
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        with open(self.path) as f:
+            specs = json.load(f)
+        return {name: RulePlan(name, spec) for name, spec in specs.items()}
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        mtime = None
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            plans = self._load()
+        except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+            if not self._plans:
+                raise
+            logger.exception("Could not reload %s; keeping the previous rule tables", self.path)
+            if mtime is not None:
+                self._mtime = mtime  # don't retry (or log again) until the file changes
+            return
+        self._plans = plans
+        self._mtime = mtime
+
+    def plan(self, name: str) -> RulePlan:
+        plan = self._plans.get(name)
+        if plan is not None and time.monotonic() < self._next_check:
+            return plan
+        with self._lock:
+            self._refresh()
+            return self._plans[name]
+
+
+rule_book = RuleBook()
+
+
+def get_plan(name: str) -> RulePlan:
+    return rule_book.plan(name)
@@ -1,9 +1,64 @@
+import re
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 
+from utils.data import TYPE_CODES, compact_amounts, compact_dates, is_compact, is_normalized
+from utils.dates import parse_dates, sniff_format
+from utils.rules import get_plan
+
+# Alternative-data signals: signal name -> regex fragments matched against lower-cased categories.
+# Add a new rail (M-Pesa, GCash, ...) by extending a list or via register_signal(); all signals
+# are evaluated by one combined matcher over the unique category strings only.
+SIGNAL_PATTERNS = {
+    "remittance": ["remittance", "transfer_international"],
+    "gig": ["gig", "upwork", "fiverr", "delivery", "rappi", "grab"],
+    "mobile_money": ["ecocash", "mpesa", "m-pesa", "momo", "zalopay", "wallet"],
+}
+
+def register_signal(name: str, patterns: list[str]) -> None:
+    """Add (or extend) a signal in SIGNAL_PATTERNS and reset the compiled matcher."""
+    SIGNAL_PATTERNS.setdefault(name, [])
+    SIGNAL_PATTERNS[name].extend(p for p in patterns if p not in SIGNAL_PATTERNS[name])
+    _signal_matcher.cache_clear()
+    _category_flags.cache_clear()
+
+@lru_cache(maxsize=1)
+def _signal_matcher() -> re.Pattern:
+    # One optional lookahead per signal, so a single match() reports every signal present
+    lookaheads = "".join(
+        f"(?=.*?(?P<{name}>{'|'.join(patterns)}))?" for name, patterns in SIGNAL_PATTERNS.items()
+    )
+    return re.compile(lookaheads, re.DOTALL)
+
+@lru_cache(maxsize=4096)
+def _category_flags(category: str) -> tuple[bool, ...]:
+    groups = _signal_matcher().match(category.lower()).groupdict()
+    return tuple(groups[name] is not None for name in SIGNAL_PATTERNS)
+
+def classify_categories(categories: pd.Series) -> pd.DataFrame:
+    """Boolean flag per signal in SIGNAL_PATTERNS for each category value.
+
+    The matcher only runs on the unique values; row flags are broadcast back by code lookup.
+    """
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        codes, uniques = categories.cat.codes.to_numpy(), categories.cat.categories
+    else:
+        codes, uniques = pd.factorize(categories)
+    table = np.zeros((len(uniques) + 1, len(SIGNAL_PATTERNS)), dtype=bool)  # last row: missing values
+    for i, value in enumerate(uniques):
+        table[i] = _category_flags(str(value))
+    flags = table[codes]
+    return pd.DataFrame(flags, columns=list(SIGNAL_PATTERNS), index=categories.index)
+
 def compute_features(transactions: pd.DataFrame) -> dict:
-    """Expect columns: date, amount, type ('inflow'/'outflow'), category (optional)."""
-    df = transactions.copy()
+    """Expect columns: date, amount, type ('inflow'/'outflow'), category (optional).
+
+    Frames in the compact layout from utils.data.to_compact are accepted as-is, and frames
+    returned by normalize_columns skip the dtype coercions.
+    """
+    df = transactions
     if df.empty:
         return {
             "avg_inflow": 0.0,
@@ -15,32 +70,47 @@ def compute_features(transactions: pd.DataFrame) -> dict:
             "mobile_money_signal": False,
         }
 
-    # Ensure required columns & dtypes
-    if "category" not in df.columns:
-        df["category"] = ""
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
-    df["date"]   = pd.to_datetime(df["date"],  errors="coerce")
-    df["type"]   = df["type"].astype(str).str.lower()
-    cat_lower    = df["category"].astype(str).str.lower()
+    if is_compact(df):
+        # Compact layout: decode dates/amounts, use the int8 type codes directly
+        df = pd.DataFrame(
+            {"date": compact_dates(df), "amount": compact_amounts(df).fillna(0.0), "category": df["category"]}
+        )
+        type_code = transactions["type_code"].to_numpy()
+        is_in, is_out = type_code == TYPE_CODES["inflow"], type_code == TYPE_CODES["outflow"]
+    elif is_normalized(df):
+        # Already coerced by normalize_columns: only fill amounts and lower-case types
+        tx_type = df["type"].str.lower()
+        df = pd.DataFrame({"date": df["date"], "amount": df["amount"].fillna(0.0), "category": df["category"]})
+        is_in, is_out = (tx_type == "inflow").to_numpy(), (tx_type == "outflow").to_numpy()
+    else:
+        df = df.copy()
+        # Ensure required columns & dtypes
+        if "category" not in df.columns:
+            df["category"] = ""
+        df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+        df["date"]   = parse_dates(df["date"])
+        df["type"]   = df["type"].astype(str).str.lower()
+        is_in, is_out = (df["type"] == "inflow").to_numpy(), (df["type"] == "outflow").to_numpy()
 
     # Monthly aggregates
     df["ym"] = df["date"].dt.to_period("M")
-    inflows  = df[df["type"] == "inflow"].groupby("ym")["amount"].sum().astype(float)
-    outflows = df[df["type"] == "outflow"].groupby("ym")["amount"].sum().astype(float)
+    inflows  = df[is_in].groupby("ym")["amount"].sum().astype(float)
+    outflows = df[is_out].groupby("ym")["amount"].sum().astype(float)
 
     avg_inflow        = float(inflows.mean()) if len(inflows) else 0.0
     income_volatility = float(inflows.std() / inflows.mean()) if len(inflows) and inflows.mean() != 0 else 1.0
-    total_in          = float(df.loc[df["type"] == "inflow",  "amount"].sum())
-    total_out         = float(df.loc[df["type"] == "outflow", "amount"].sum())
+    total_in          = float(df.loc[is_in,  "amount"].sum())
+    total_out         = float(df.loc[is_out, "amount"].sum())
     expense_ratio     = float(total_out / total_in) if total_in > 0 else 1.0
 
     # Overdraft proxy: months where outflow > inflow by 10%
     overdraft_count = int((outflows.reindex(inflows.index, fill_value=0) > inflows * 1.1).sum())
 
     # Alternative-data signals
-    remittance_mask   = cat_lower.str.contains(r"(remittance|transfer_international)", regex=True, na=False)
-    gig_mask          = cat_lower.str.contains(r"(gig|upwork|fiverr|delivery|rappi|grab)", regex=True, na=False)
-    mobile_money_mask = cat_lower.str.contains(r"(ecocash|mpesa|m-pesa|momo|zalopay|wallet)", regex=True, na=False)
+    signals           = classify_categories(df["category"])
+    remittance_mask   = signals["remittance"]
+    gig_mask          = signals["gig"]
+    mobile_money_mask = signals["mobile_money"]
 
     remittance_count  = int(remittance_mask.sum())
     gig_months_active = int(df[gig_mask].groupby("ym")["amount"].sum().shape[0])
@@ -57,43 +127,206 @@ def compute_features(transactions: pd.DataFrame) -> dict:
     }
 
 def rule_based_score(feats: dict) -> tuple[int, str]:
-    score = 50
-
-    # avg inflow
-    if feats["avg_inflow"] >= 800:
-        score += 15
-    elif feats["avg_inflow"] >= 400:
-        score += 5
-
-    # income volatility
-    if feats["income_volatility"] > 0.6:
-        score -= 10
-    elif feats["income_volatility"] > 0.4:
-        score -= 5
-
-    # expense ratio
-    if feats["expense_ratio"] > 0.95:
-        score -= 12
-    elif feats["expense_ratio"] > 0.8:
-        score -= 6
-    elif feats["expense_ratio"] < 0.6:
-        score += 4
-
-    # overdrafts
-    score -= min(24, 8 * feats["overdraft_count"])
-
-    # remittances
-    if feats["remittance_count"] >= 3:
-        score += 6
-
-    # gig activity
-    if feats["gig_months_active"] >= 3:
-        score += 8
-
-    # mobile money
-    if feats["mobile_money_signal"]:
-        score += 4
-
-    score = max(0, min(100, score))
-    band = "Prime" if score >= 86 else "Green" if score >= 70 else "Amber" if score >= 50 else "Red"
-    return int(score), band
+    # thresholds live in config/scoring_rules.json ("transaction_score")
+    result = get_plan("transaction_score").evaluate_one(**feats)
+    return int(result["score"]), result["band"]
+
+FEATURE_COLUMNS = [
+    "avg_inflow",
+    "income_volatility",
+    "expense_ratio",
+    "overdraft_count",
+    "remittance_count",
+    "gig_months_active",
+    "mobile_money_signal",
+]
+
+def _round2(values) -> np.ndarray:
+    # builtin round() so batch output matches compute_features bit-for-bit
+    return np.array([round(float(v), 2) for v in values], dtype=float)
+
+def _monthly_stats(inflows: pd.Series, index: pd.Index):
+    """Per-user mean and std of monthly inflows, summed exactly like Series.mean()/std().
+
+    groupby().mean() accumulates in a different order than the single-user path, which
+    can flip the rounded cent. Users with the same month count are stacked into one 2-D
+    block whose row sums are the same pairwise sums numpy uses for a 1-D Series.
+    """
+    mean = np.full(len(index), np.nan)
+    std = np.full(len(index), np.nan)
+    codes = index.get_indexer(inflows.index.get_level_values(0))
+    order = np.argsort(codes, kind="stable")
+    values = inflows.to_numpy(dtype=float)[order]
+    counts = np.bincount(codes, minlength=len(index))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    for n in np.unique(counts[counts > 0]):
+        users = np.flatnonzero(counts == n)
+        block = values[starts[users][:, None] + np.arange(n)]
+        avg = block.sum(axis=1, dtype=np.float64) / n
+        mean[users] = avg
+        if n > 1:
+            std[users] = np.sqrt(((avg[:, None] - block) ** 2).sum(axis=1, dtype=np.float64) / (n - 1))
+    return pd.Series(mean, index=index), pd.Series(std, index=index)
+
+def compute_features_batch(df: pd.DataFrame, user_col: str = "user_id") -> pd.DataFrame:
+    """Same features as compute_features, for every user in a long-format frame.
+
+    Returns one row per user (indexed by `user_col`) with FEATURE_COLUMNS.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=FEATURE_COLUMNS, index=pd.Index([], name=user_col))
+
+    users  = df[user_col]
+    amount = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+    dates  = parse_dates(df["date"])
+    ttype  = df["type"].astype(str).str.lower()
+
+    # Month key as an integer (NaN for unparseable dates, dropped by groupby like NaT periods)
+    ym = dates.dt.year * 12 + dates.dt.month
+    is_in  = (ttype == "inflow").to_numpy()
+    is_out = (ttype == "outflow").to_numpy()
+
+    # Monthly aggregates per (user, month)
+    inflows  = amount[is_in].groupby([users[is_in], ym[is_in]]).sum().astype(float)
+    outflows = amount[is_out].groupby([users[is_out], ym[is_out]]).sum().astype(float)
+
+    index = pd.Index(users.dropna().unique(), name=user_col)
+    n_months = inflows.groupby(level=0).size().reindex(index, fill_value=0)
+    mean_in, std_in = _monthly_stats(inflows, index)
+
+    avg_inflow = mean_in.where(n_months > 0, 0.0)
+    income_volatility = (std_in / mean_in).where((n_months > 0) & (mean_in != 0), 1.0)
+
+    total_in  = amount.where(is_in, 0.0).groupby(users).sum().reindex(index, fill_value=0.0)
+    total_out = amount.where(is_out, 0.0).groupby(users).sum().reindex(index, fill_value=0.0)
+    expense_ratio = (total_out / total_in).where(total_in > 0, 1.0)
+
+    # Overdraft proxy: months where outflow > inflow by 10%
+    overdraft = outflows.reindex(inflows.index, fill_value=0) > inflows * 1.1
+    overdraft_count = overdraft.groupby(level=0).sum().reindex(index, fill_value=0)
+
+    # Alternative-data signals
+    categories        = df["category"] if "category" in df.columns else pd.Series("", index=df.index)
+    signals           = classify_categories(categories)
+    remittance_mask   = signals["remittance"]
+    gig_mask          = signals["gig"]
+    mobile_money_mask = signals["mobile_money"]
+
+    remittance_count = remittance_mask.groupby(users).sum().reindex(index, fill_value=0)
+    gig_pairs = pd.DataFrame({"u": users[gig_mask], "ym": ym[gig_mask]}).dropna().drop_duplicates()
+    gig_months_active = gig_pairs.groupby("u").size().reindex(index, fill_value=0)
+    mobile_money_signal = mobile_money_mask.groupby(users).any().reindex(index, fill_value=False)
+
+    return pd.DataFrame(
+        {
+            "avg_inflow": _round2(avg_inflow),
+            "income_volatility": _round2(income_volatility),
+            "expense_ratio": _round2(expense_ratio),
+            "overdraft_count": overdraft_count.to_numpy(dtype=int),
+            "remittance_count": remittance_count.to_numpy(dtype=int),
+            "gig_months_active": gig_months_active.to_numpy(dtype=int),
+            "mobile_money_signal": mobile_money_signal.to_numpy(dtype=bool),
+        },
+        index=index,
+    )
+
+def rule_based_score_batch(feats) -> pd.DataFrame:
+    """Vectorized rule_based_score over a features frame (or dict of arrays).
+
+    Returns a frame with integer `score` and string `band` columns aligned to the input rows.
+    """
+    index = feats.index if isinstance(feats, pd.DataFrame) else None
+    result = get_plan("transaction_score").evaluate(feats)
+    return pd.DataFrame({"score": result["score"], "band": result["band"]}, index=index)
+
+def _kahan_add(acc: list, value: float) -> None:
+    # Compensated sum, same scheme as pandas' groupby sum
+    y = value - acc[1]
+    t = acc[0] + y
+    acc[1] = (t - acc[0]) - y
+    acc[0] = t
+
+class IncrementalFeatureState:
+    """Running aggregates for one user; `to_dict()` equals compute_features on the full history.
+
+    Each `update` is O(1): it touches one month bucket and a few counters. Date strings are
+    parsed with `date_format` (as sniffed by utils.dates; None lets pandas infer each one).
+    """
+
+    def __init__(self, date_format: str | None = None):
+        self.date_format = date_format
+        self.n_rows = 0
+        self.inflows = {}    # month -> [sum, compensation]
+        self.outflows = {}
+        self.total_in = [0.0, 0.0]
+        self.total_out = [0.0, 0.0]
+        self.remittance_count = 0
+        self.gig_months = set()
+        self.mobile_money_signal = False
+
+    @classmethod
+    def from_transactions(cls, transactions: pd.DataFrame) -> "IncrementalFeatureState":
+        """State over a user's history, parsing its dates (and later updates) with the sniffed format."""
+        dates = transactions["date"] if "date" in transactions.columns else pd.Series(dtype=object)
+        state = cls(sniff_format(dates) if dates.dtype == object else None)
+        state.update_frame(transactions)
+        return state
+
+    def update(self, date, amount, tx_type, category="") -> None:
+        amount = pd.to_numeric(amount, errors="coerce")
+        amount = 0.0 if pd.isna(amount) else float(amount)
+        fmt = self.date_format if isinstance(date, str) else None
+        date = pd.to_datetime(date, format=fmt, errors="coerce")
+        month = None if pd.isna(date) else (date.year, date.month)
+        tx_type = str(tx_type).lower()
+        signals = dict(zip(SIGNAL_PATTERNS, _category_flags(str(category))))
+
+        self.n_rows += 1
+        if tx_type == "inflow":
+            _kahan_add(self.total_in, amount)
+            if month is not None:
+                _kahan_add(self.inflows.setdefault(month, [0.0, 0.0]), amount)
+        elif tx_type == "outflow":
+            _kahan_add(self.total_out, amount)
+            if month is not None:
+                _kahan_add(self.outflows.setdefault(month, [0.0, 0.0]), amount)
+
+        if signals["remittance"]:
+            self.remittance_count += 1
+        if month is not None and signals["gig"]:
+            self.gig_months.add(month)
+        if signals["mobile_money"]:
+            self.mobile_money_signal = True
+
+    def update_frame(self, transactions: pd.DataFrame) -> None:
+        categories = transactions["category"] if "category" in transactions.columns else [""] * len(transactions)
+        for date, amount, tx_type, category in zip(transactions["date"], transactions["amount"], transactions["type"], categories):
+            self.update(date, amount, tx_type, category)
+
+    def to_dict(self) -> dict:
+        if self.n_rows == 0:
+            return compute_features(pd.DataFrame())
+
+        months = sorted(self.inflows)
+        inflows = np.array([self.inflows[m][0] for m in months], dtype=float)
+        avg_inflow = float(inflows.mean()) if len(inflows) else 0.0
+        if len(inflows) and inflows.mean() != 0:
+            income_volatility = float(inflows.std(ddof=1) / inflows.mean()) if len(inflows) > 1 else float("nan")
+        else:
+            income_volatility = 1.0
+        total_in, total_out = self.total_in[0], self.total_out[0]
+        expense_ratio = float(total_out / total_in) if total_in > 0 else 1.0
+
+        overdraft_count = sum(
+            1 for m in months if self.outflows.get(m, [0.0])[0] > self.inflows[m][0] * 1.1
+        )
+
+        return {
+            "avg_inflow": round(avg_inflow, 2),
+            "income_volatility": round(float(income_volatility), 2),
+            "expense_ratio": round(float(expense_ratio), 2),
+            "overdraft_count": int(overdraft_count),
+            "remittance_count": int(self.remittance_count),
+            "gig_months_active": len(self.gig_months),
+            "mobile_money_signal": bool(self.mobile_money_signal),
+        }
@@ -0,0 +1,83 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from utils.dates import parse_dates
+from utils.scoring import compute_features
+
+_PARTITIONING = ds.partitioning(pa.schema([("bucket", pa.int32()), ("month", pa.string())]), flavor="hive")
+_FEATURE_COLUMNS = ["date", "amount", "type", "category"]
+
+
+def user_bucket(users, n_buckets: int) -> np.ndarray:
+    """Stable bucket id per user (hash of the string form, not Python's salted hash())."""
+    values = np.asarray(pd.Series(users).astype(str), dtype=object)
+    return (pd.util.hash_array(values) % np.uint64(n_buckets)).astype(np.int32)
+
+
+class TransactionStore:
+    """Local Parquet store partitioned as bucket=<user hash % n_buckets>/month=<YYYY-MM>.
+
+    Reads push filters on user, date range and type down to the dataset scanner, so only
+    the matching partitions, row groups and requested columns are read from disk.
+    """
+
+    def __init__(self, root: str, user_col: str = "user_id", n_buckets: int = 64):
+        self.root = root
+        self.user_col = user_col
+        self.n_buckets = n_buckets
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append transactions (long format, one `user_col` column) to the store."""
+        out = pd.DataFrame(
+            {
+                self.user_col: df[self.user_col].astype(str),
+                "date": parse_dates(df["date"]),
+                "amount": pd.to_numeric(df["amount"], errors="coerce"),
+                "type": df["type"].astype(str).str.lower(),
+                "category": (df["category"] if "category" in df.columns else pd.Series("", index=df.index)).astype(str),
+            }
+        )
+        out["bucket"] = user_bucket(out[self.user_col], self.n_buckets)
+        out["month"] = out["date"].dt.strftime("%Y-%m")
+        ds.write_dataset(
+            pa.Table.from_pandas(out, preserve_index=False),
+            self.root,
+            format="parquet",
+            partitioning=_PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def _dataset(self) -> ds.Dataset:
+        return ds.dataset(self.root, format="parquet", partitioning=_PARTITIONING)
+
+    def read(self, users=None, start=None, end=None, types=None, columns=None) -> pd.DataFrame:
+        """Transactions matching all given filters; `end` is exclusive."""
+        expr = None
+
+        def both(e):
+            return e if expr is None else expr & e
+
+        if users is not None:
+            users = [str(u) for u in users]
+            buckets = np.unique(user_bucket(users, self.n_buckets)).tolist()
+            expr = both(ds.field("bucket").isin(buckets) & ds.field(self.user_col).isin(users))
+        if start is not None:
+            start = pd.Timestamp(start)
+            expr = both((ds.field("month") >= start.strftime("%Y-%m")) & (ds.field("date") >= start.to_pydatetime()))
+        if end is not None:
+            end = pd.Timestamp(end)
+            expr = both((ds.field("month") <= end.strftime("%Y-%m")) & (ds.field("date") < end.to_pydatetime()))
+        if types is not None:
+            expr = both(ds.field("type").isin([str(t).lower() for t in types]))
+
+        columns = columns or [self.user_col] + _FEATURE_COLUMNS
+        return self._dataset().to_table(columns=columns, filter=expr).to_pandas()
+
+    def compute_features(self, user, start=None, end=None) -> dict:
+        """compute_features for one user, reading only that user's bucket and months."""
+        return compute_features(self.read(users=[user], start=start, end=end, columns=_FEATURE_COLUMNS))
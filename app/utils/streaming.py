@@ -0,0 +1,79 @@
+from collections.abc import Iterable, Iterator
+
+import pandas as pd
+
+from utils.scoring import compute_features_batch, rule_based_score_batch
+
+_COLUMNS = {"date", "amount", "type", "category"}
+
+
+def iter_features_csv(
+    paths: str | Iterable[str],
+    user_col: str = "user_id",
+    chunksize: int = 500_000,
+    score: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Stream features (and optionally score/band) for transaction CSVs too large for memory.
+
+    Each file must keep a user's rows contiguous (sorted by user), or the files must be
+    partitioned so no user spans two files; a user reappearing after being scored raises
+    ValueError. Rows are read `chunksize` at a time; the trailing user of a chunk may
+    continue in the next one, so its rows are carried over and scored once complete.
+    Memory is bounded by the chunk size plus the longest single-user history (and a set
+    of finished user ids), and results equal compute_features for every user. Rows
+    without a user id are skipped, as compute_features_batch does.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    emitted = set()
+    for path in paths:
+        carry = None
+        reader = pd.read_csv(path, chunksize=chunksize, usecols=lambda c: c == user_col or c in _COLUMNS)
+        for chunk in reader:
+            chunk = chunk[chunk[user_col].notna()]  # compute_features_batch drops these rows too
+            if chunk.empty:
+                continue
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            users = chunk[user_col]
+            runs = int((users != users.shift()).sum())
+            if runs != users.nunique():
+                raise ValueError(f"{path}: rows for each {user_col!r} must be contiguous")
+
+            tail = users.eq(users.iloc[-1]).to_numpy()
+            carry = chunk[tail]
+            done = chunk[~tail]
+            if not done.empty:
+                _mark_emitted(emitted, done[user_col], path, user_col)
+                yield _finish(done, user_col, score)
+        if carry is not None and not carry.empty:
+            _mark_emitted(emitted, carry[user_col], path, user_col)
+            yield _finish(carry, user_col, score)
+
+
+def _mark_emitted(emitted: set, users: pd.Series, path: str, user_col: str) -> None:
+    finished = set(users.unique())
+    repeated = finished & emitted
+    if repeated:
+        raise ValueError(
+            f"{path}: {user_col!r} {next(iter(repeated))!r} reappears after its rows were scored; "
+            "keep each user's rows contiguous and in one file"
+        )
+    emitted.update(finished)
+
+
+def _finish(df: pd.DataFrame, user_col: str, score: bool) -> pd.DataFrame:
+    feats = compute_features_batch(df, user_col=user_col)
+    return feats.join(rule_based_score_batch(feats)) if score else feats
+
+
+def score_csv(
+    paths: str | Iterable[str],
+    user_col: str = "user_id",
+    chunksize: int = 500_000,
+    score: bool = True,
+) -> pd.DataFrame:
+    """Collect iter_features_csv output into one frame (one row per user)."""
+    parts = list(iter_features_csv(paths, user_col=user_col, chunksize=chunksize, score=score))
+    return pd.concat(parts) if parts else pd.DataFrame()
@@ -0,0 +1,53 @@
+"""Date parsing: pd.to_datetime(errors="coerce") vs utils.dates.parse_dates.
+
+    python benchmarks/bench_dates.py --rows 1000000 --unique 2000
+
+Runs each statement date format at the given row count, with `--unique` distinct dates
+repeated across the rows (typical for statements), and prints both timings.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from bench_scoring import measure  # noqa: E402
+from utils.dates import DateParser  # noqa: E402
+
+FORMATS = {
+    "bank (ISO)": "%Y-%m-%d",
+    "ecocash (dd/mm/yyyy)": "%d/%m/%Y",
+    "momo (dd.mm.yyyy)": "%d.%m.%Y",
+    "export (dd Mon yyyy)": "%d %b %Y",
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2019-01-01", periods=args.unique)
+    picks = rng.integers(0, args.unique, args.rows)
+
+    for source, fmt in FORMATS.items():
+        values = pd.Series(days.strftime(fmt).to_numpy(dtype=object)[picks])
+        baseline = measure(lambda: pd.to_datetime(values, errors="coerce"), args.rows, args.repeat)
+        date_parser = DateParser()
+        current = measure(lambda: date_parser.parse(values, source=source), args.rows, args.repeat)
+        speedup = baseline["latency_p50_s"] / current["latency_p50_s"]
+        print(
+            f"{source:<24} to_datetime {baseline['latency_p50_s'] * 1e3:>9.1f} ms   "
+            f"parse_dates {current['latency_p50_s'] * 1e3:>8.1f} ms   x{speedup:,.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Benchmarks for the scoring pipeline (normalize_columns, compute_features, rule_based_score).
+
+    python benchmarks/bench_scoring.py --sizes 1x50,1kx100k
+    python benchmarks/bench_scoring.py --sizes 1kx100k --save benchmarks/baseline.json
+    python benchmarks/bench_scoring.py --sizes 1kx100k --compare benchmarks/baseline.json --tolerance 0.25
+
+Each stage reports throughput (rows/s at the median), latency percentiles over the repeats
+and peak traced memory. --compare exits with status 1 if any stage's median latency or
+peak memory grew by more than --tolerance relative to the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from utils.data import normalize_columns  # noqa: E402
+from utils.scoring import (  # noqa: E402
+    compute_features,
+    compute_features_batch,
+    rule_based_score,
+    rule_based_score_batch,
+)
+
+# name -> (users, rows)
+SIZES = {
+    "1x50": (1, 50),
+    "1kx100k": (1_000, 100_000),
+    "10kx1m": (10_000, 1_000_000),
+    "100kx10m": (100_000, 10_000_000),
+    "1mx100m": (1_000_000, 100_000_000),
+}
+
+CATEGORIES = np.array(
+    ["salary", "rent", "groceries", "transport", "ecocash_gig", "wallet_spend", "remittance_in", "upwork payout"]
+)
+
+
+def synthetic_transactions(n_users: int, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Long-format workload: uniform users over six months, mixed inflow/outflow categories."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01")
+    return pd.DataFrame(
+        {
+            "user_id": np.sort(rng.integers(0, n_users, n_rows)),
+            "date": start + rng.integers(0, 180, n_rows).astype("timedelta64[D]"),
+            "amount": rng.gamma(2.0, 150.0, n_rows).round(2),
+            "type": np.where(rng.random(n_rows) < 0.45, "inflow", "outflow"),
+            "category": CATEGORIES[rng.integers(0, len(CATEGORIES), n_rows)],
+        }
+    )
+
+
+def stages(df: pd.DataFrame) -> dict:
+    first_user = df[df["user_id"] == df["user_id"].iloc[0]].drop(columns="user_id")
+    feats = compute_features_batch(df)
+    feat_dicts = feats.to_dict("records")
+    return {
+        "normalize_columns": (len(df), lambda: normalize_columns(df.drop(columns="user_id"))),
+        "compute_features[single user]": (len(first_user), lambda: compute_features(first_user)),
+        "compute_features_batch": (len(df), lambda: compute_features_batch(df)),
+        "rule_based_score[loop]": (len(feat_dicts), lambda: [rule_based_score(f) for f in feat_dicts]),
+        "rule_based_score_batch": (len(feats), lambda: rule_based_score_batch(feats)),
+    }
+
+
+def measure(fn, rows: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        "rows": rows,
+        "repeat": repeat,
+        "throughput_rows_per_s": rows / p50 if p50 > 0 else float("inf"),
+        "latency_p50_s": p50,
+        "latency_p95_s": p95,
+        "latency_p99_s": p99,
+        "peak_memory_bytes": int(peak),
+    }
+
+
+def run(sizes: list[str], repeat: int) -> dict:
+    results = {}
+    for size in sizes:
+        n_users, n_rows = SIZES[size]
+        df = synthetic_transactions(n_users, n_rows)
+        for stage, (rows, fn) in stages(df).items():
+            key = f"{size}/{stage}"
+            results[key] = measure(fn, rows, repeat)
+            r = results[key]
+            print(
+                f"{key:<45} {r['throughput_rows_per_s']:>14,.0f} rows/s  "
+                f"p50 {r['latency_p50_s'] * 1e3:>9.2f} ms  p95 {r['latency_p95_s'] * 1e3:>9.2f} ms  "
+                f"peak {r['peak_memory_bytes'] / 2**20:>8.1f} MiB"
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, base in baseline.items():
+        if key not in results:
+            continue
+        for metric in ("latency_p50_s", "peak_memory_bytes"):
+            old, new = base[metric], results[key][metric]
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1x50,1kx100k", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    results = run(sizes, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "pandas": pd.__version__, "results": results}, f, indent=2
+            )
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions beyond tolerance:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.borrower_db import SqliteBorrowerStore
+from utils.borrowers import (
+    INDEXED_COLUMNS, STATUSES, BorrowerOverlay, BorrowerStore, FacetIndex, synthetic_borrowers,
+)
+
+CRITERIA = [
+    {},
+    dict(countries=["Kenya", "India"], risk_bands=["Low", "High"], score_range=(600, 800), max_volatility=50),
+    dict(statuses=["In review"], score_range=(700, 700)),
+]
+
+
+def assert_same_index(got: FacetIndex, expected: FacetIndex, check_positions: bool = True) -> None:
+    for criteria in CRITERIA:
+        assert got.matching(**criteria) == expected.matching(**criteria)
+        if check_positions:
+            np.testing.assert_array_equal(got.positions(**criteria), expected.positions(**criteria))
+        for column in INDEXED_COLUMNS:
+            assert got.facet_counts(column, **criteria) == expected.facet_counts(column, **criteria)
+
+
+def test_store_insert_appends_to_facet_index():
+    book = synthetic_borrowers(2_000, seed=1)
+    store = BorrowerStore(book.iloc[:1_500])
+    store.insert(book.iloc[1_500:1_501])
+    store.insert(book.iloc[1_501:])
+    assert_same_index(store._facets, FacetIndex(store.frame()))
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SqliteBorrowerStore(str(tmp_path / "borrowers.db"), seed=synthetic_borrowers(1_500, seed=1, start_id=501))
+    yield store
+    store.close()
+
+
+def test_sqlite_insert_appends_to_facet_index(sqlite_store):
+    appended = sqlite_store.facets()
+    sqlite_store.insert(synthetic_borrowers(500, seed=2).sample(frac=1, random_state=0))  # lower IDs, shuffled
+    sqlite_store.decide(7, "Declined")
+    assert sqlite_store.facets() is appended and appended.version == sqlite_store.version
+
+    sqlite_store._facets = None
+    assert_same_index(appended, sqlite_store.facets(), check_positions=False)
+
+
+# ---------- FacetIndex and BorrowerOverlay against plain pandas masks ----------
+CRITERIA_KEYS = {"Country": "countries", "Risk band": "risk_bands", "Status": "statuses"}
+
+
+def random_criteria(rng) -> dict:
+    def pick(values):
+        return None if rng.random() < 0.3 else list(rng.choice(values, rng.integers(0, len(values) + 1), replace=False))
+
+    lo = int(rng.integers(450, 851))
+    return dict(
+        countries=pick(["Philippines", "Kenya", "India", "Mexico", "Atlantis"]),
+        risk_bands=pick(["Low", "Medium", "High"]),
+        statuses=pick(STATUSES),
+        score_range=None if rng.random() < 0.3 else (lo, lo + int(rng.integers(0, 200))),
+        max_volatility=None if rng.random() < 0.3 else int(rng.integers(0, 101)),
+    )
+
+
+def mask(frame: pd.DataFrame, countries=None, risk_bands=None, statuses=None, score_range=None, max_volatility=None):
+    keep = np.ones(len(frame), dtype=bool)
+    for column, values in (("Country", countries), ("Risk band", risk_bands), ("Status", statuses)):
+        if values is not None:
+            keep &= frame[column].isin(values).to_numpy()
+    if score_range is not None:
+        keep &= frame["AI Score"].between(*score_range).to_numpy()
+    if max_volatility is not None:
+        keep &= (frame["Volatility"] <= max_volatility).to_numpy()
+    return keep
+
+
+def expected_facets(frame: pd.DataFrame, column: str, criteria: dict) -> dict:
+    others = mask(frame, **{**criteria, CRITERIA_KEYS[column]: None})
+    return {value: int((others & (frame[column] == value).to_numpy()).sum()) for value in sorted(frame[column].unique())}
+
+
+def assert_matches_frame(store, frame: pd.DataFrame, rng, rounds: int = 25) -> None:
+    for _ in range(rounds):
+        criteria = random_criteria(rng)
+        np.testing.assert_array_equal(store.filter(**criteria), np.flatnonzero(mask(frame, **criteria)))
+        for column in INDEXED_COLUMNS:
+            assert store.facet_counts(column, **criteria) == expected_facets(frame, column, criteria)
+
+
+def test_facet_index_matches_masks():
+    book = synthetic_borrowers(3_000, seed=4)
+    index = FacetIndex(book)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        for _ in range(50):
+            pos = int(rng.integers(0, len(book)))
+            new = STATUSES[rng.integers(0, 3)]
+            index.set(pos, "Status", book.at[pos, "Status"], new)
+            book.at[pos, "Status"] = new
+        for _ in range(25):
+            criteria = random_criteria(rng)
+            np.testing.assert_array_equal(index.positions(**criteria), np.flatnonzero(mask(book, **criteria)))
+            for column in INDEXED_COLUMNS:
+                assert index.facet_counts(column, **criteria) == expected_facets(book, column, criteria)
+
+
+def edit_randomly(overlay: BorrowerOverlay, merged: pd.DataFrame, rng, n: int = 60) -> None:
+    """Apply the same random decisions and credits to the overlay and to a plain frame."""
+    for _ in range(n):
+        pos = int(rng.integers(0, len(merged)))
+        borrower_id = int(merged.at[pos, "ID"])
+        status = STATUSES[rng.integers(0, 3)]
+        amount = int(rng.integers(1, 100))
+        overlay.decide(borrower_id, status, "Wallet balance", amount)
+        merged.at[pos, "Status"] = status
+        merged.at[pos, "Wallet balance"] += amount
+
+
+def test_overlay_reads_match_merged_frame():
+    book = synthetic_borrowers(3_000, seed=5)
+    base = BorrowerStore(book)
+    overlay = BorrowerOverlay(base)
+    merged = book.copy()
+    rng = np.random.default_rng(1)
+    edit_randomly(overlay, merged, rng)
+
+    assert_matches_frame(overlay, merged, rng)
+    for status in STATUSES:
+        assert overlay.count("Status", status) == int((merged["Status"] == status).sum())
+    # the shared snapshot is untouched
+    pd.testing.assert_frame_equal(base.frame(), BorrowerStore(book).frame())
+
+
+@pytest.mark.parametrize("sort_by", ["Status", "Wallet balance", "AI Score"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_overlay_page_sorts_by_merged_values(sort_by, descending):
+    book = synthetic_borrowers(1_000, seed=6)
+    overlay = BorrowerOverlay(BorrowerStore(book))
+    merged = book.copy()
+    rng = np.random.default_rng(2)
+    edit_randomly(overlay, merged, rng)
+
+    criteria = dict(statuses=["Approved", "Declined"], max_volatility=70)
+    positions = overlay.filter(**criteria)
+    expected = merged[mask(merged, **criteria)].sort_values([sort_by, "ID"], ascending=[not descending, True], kind="stable")
+    for number in range(3):
+        page = overlay.page(positions, number, 25, sort_by, descending)
+        pd.testing.assert_frame_equal(
+            page.reset_index(drop=True), expected.iloc[number * 25: (number + 1) * 25].reset_index(drop=True),
+            check_dtype=False,
+        )
+
+
+def test_overlay_rebase_keeps_edits_on_a_reordered_snapshot():
+    book = synthetic_borrowers(2_000, seed=7)
+    overlay = BorrowerOverlay(BorrowerStore(book))
+    merged = book.copy()
+    rng = np.random.default_rng(3)
+    edit_randomly(overlay, merged, rng)
+
+    newer = book.sample(frac=1, random_state=0).reset_index(drop=True)
+    other = newer.index[~newer["ID"].isin(list(overlay._delta))][:20]
+    newer.loc[other, "Status"] = "Declined"  # decided elsewhere, not edited here
+    overlay.rebase(BorrowerStore(newer))
+
+    expected = newer.set_index("ID")
+    expected.update(merged.set_index("ID").loc[list(overlay._delta), ["Status", "Wallet balance"]])
+    expected = expected.reset_index()[newer.columns]
+    assert_matches_frame(overlay, expected, rng, rounds=10)
+    for borrower_id in list(overlay._delta)[:10]:
+        assert overlay.get(borrower_id)["Wallet balance"] == expected.loc[expected["ID"] == borrower_id, "Wallet balance"].item()
+
+
+def test_overlay_commit_detects_conflicts(sqlite_store):
+    snapshot = BorrowerStore(pd.concat(sqlite_store.iter_frames(), ignore_index=True))
+    overlay = BorrowerOverlay(snapshot)
+    mine, theirs = 510, 520
+    before = {bid: sqlite_store.get(bid) for bid in (mine, theirs)}
+    target = next(s for s in STATUSES if s != before[theirs]["Status"])
+    overlay.decide(mine, "Approved", "Bank balance", 40)
+    overlay.decide(theirs, target, "Wallet balance", 15)
+    sqlite_store.decide(theirs, next(s for s in STATUSES if s not in (before[theirs]["Status"], target)))
+
+    version = sqlite_store.version
+    assert overlay.commit(sqlite_store) == [theirs]
+    assert sqlite_store.version == version and sqlite_store.get(mine) == before[mine]
+    assert overlay.pending == 2
+
+    overlay.discard()
+    overlay.decide(mine, "Approved", "Bank balance", 40)
+    assert overlay.commit(sqlite_store) == []
+    assert overlay.pending == 0
+    after = sqlite_store.get(mine)
+    assert after["Status"] == "Approved" and after["Bank balance"] == before[mine]["Bank balance"] + 40
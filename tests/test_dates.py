@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.dates import DateParser, sniff_format
+from utils.scoring import compute_features
+
+
+def statement(fmt: str, days, amount: float = 100.0) -> pd.DataFrame:
+    dates = pd.DatetimeIndex(days)
+    return pd.DataFrame(
+        {
+            "date": dates.strftime(fmt),
+            "amount": amount * np.arange(1, len(dates) + 1),
+            "type": "inflow",
+            "category": "salary",
+        }
+    )
+
+
+def day_first_statement() -> pd.DataFrame:
+    # 97% of days are <= 12, so month-first also parses most of the column
+    days = [f"2025-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 13)][:97] + ["2025-03-25"] * 3
+    return statement("%d/%m/%Y", days)
+
+
+def test_sniff_prefers_month_first_on_ties():
+    assert sniff_format(pd.Series(["03/04/2025", "01/02/2025"])) == "%m/%d/%Y"
+    assert sniff_format(pd.Series(["03/04/2025", "25/02/2025"])) == "%d/%m/%Y"
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        statement("%m/%d/%Y", ["2025-01-03", "2025-01-25", "2025-02-14"]),
+        statement("%d/%m/%Y", ["2025-01-03", "2025-01-25", "2025-02-14"]),
+        statement("%Y-%m-%d", ["2025-01-03", "2025-01-25"]),
+    ],
+)
+def test_results_do_not_depend_on_the_previous_frame(other, monkeypatch):
+    import utils.dates
+
+    monkeypatch.setattr(utils.dates, "date_parser", DateParser())
+    frame = day_first_statement()
+    fresh = compute_features(frame)
+    compute_features(other)
+    assert compute_features(frame) == fresh
+    compute_features(frame.iloc[:12])  # ambiguous on its own: month-first
+    assert compute_features(frame) == fresh
+
+
+def test_reused_format_matches_fresh_parse():
+    parser = DateParser()
+    ambiguous = pd.Series(["03/04/2025", "05/06/2025"])
+    parser.parse(pd.Series(["25/04/2025"] * 3))
+    np.testing.assert_array_equal(parser.parse(ambiguous), DateParser().parse(ambiguous))
+    with_garbage = pd.Series(["2025-01-02", "x", None, "2025-02-03"])
+    parser.parse(pd.Series(["2025-01-01"]))
+    np.testing.assert_array_equal(parser.parse(with_garbage), DateParser().parse(with_garbage))
@@ -0,0 +1,32 @@
+import gc
+import gzip
+import os
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from utils.borrowers import BorrowerStore, demo_borrowers
+from utils.export import ExportFile
+
+
+def test_empty_selection_keeps_header_and_schema():
+    store = BorrowerStore(demo_borrowers())
+    empty = np.array([], dtype=int)
+
+    csv = ExportFile(store.iter_frames(empty), "csv.gz")
+    assert csv.rows == 0
+    assert gzip.open(csv.path).read().decode().startswith("ID,Name,Country")
+
+    parquet = ExportFile(store.iter_frames(empty), "parquet")
+    table = pq.read_table(parquet.path)
+    assert parquet.rows == table.num_rows == 0
+    assert table.schema.names[:3] == ["ID", "Name", "Country"]
+
+
+def test_export_file_is_removed_with_its_owner():
+    export = ExportFile(BorrowerStore(demo_borrowers()).iter_frames(), "parquet")
+    path = export.path
+    assert pq.read_table(path).num_rows == export.rows == len(demo_borrowers())
+    del export
+    gc.collect()
+    assert not os.path.exists(path)
@@ -0,0 +1,112 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.loans import FREQUENCIES, LoanLedger, build_schedules, schedule_frame
+
+
+def old_page_schedule(approved_amount, apr, duration_weeks, repayment_frequency) -> pd.DataFrame:
+    """The Microloan page's per-period loop that build_schedules replaced."""
+    term_years = duration_weeks / 52
+    simple_interest = approved_amount * (apr / 100) * term_years
+    total_repay = approved_amount + simple_interest
+    if repayment_frequency == "Weekly":
+        num_payments, period_label = duration_weeks, "Week"
+    elif repayment_frequency == "Bi-Weekly":
+        num_payments, period_label = max(1, duration_weeks // 2), "Bi-week"
+    else:
+        num_payments, period_label = max(1, round(duration_weeks / 4)), "Month"
+    num_payments = int(max(1, num_payments))
+    principal_per = approved_amount / num_payments
+    interest_per = simple_interest / num_payments
+    assert total_repay / num_payments == pytest.approx(principal_per + interest_per)
+
+    rows = []
+    remaining = approved_amount
+    for i in range(1, num_payments + 1):
+        principal_i = 0 if remaining <= 0 else min(principal_per, remaining)
+        remaining = max(0, remaining - principal_i)
+        rows.append(
+            {
+                "#": i,
+                "Period": f"{period_label} {i}",
+                "Principal": round(principal_i, 2),
+                "Interest": round(interest_per, 2),
+                "Total payment": round(principal_i + interest_per, 2),
+                "Remaining balance": round(remaining, 2),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+LOANS = pd.DataFrame(
+    list(itertools.product([20, 130, 455, 800], [0.0, 5.9, 12.75, 31.4], range(2, 25), list(FREQUENCIES))),
+    columns=["amount", "apr", "weeks", "frequency"],
+)
+
+
+@pytest.mark.parametrize("frequency", list(FREQUENCIES))
+def test_simple_schedules_match_the_page_loop(frequency):
+    loans = LOANS[LOANS["frequency"] == frequency].reset_index(drop=True)
+    schedules = build_schedules(loans["amount"], loans["apr"], loans["weeks"], loans["frequency"])
+    label = FREQUENCIES[frequency][1]
+    for i, loan in loans.iterrows():
+        expected = old_page_schedule(loan["amount"], loan["apr"], loan["weeks"], frequency)
+        pd.testing.assert_frame_equal(schedule_frame(schedules, label, i), expected, check_dtype=False)
+
+
+def test_declining_balance_amortizes_to_zero():
+    s = build_schedules(LOANS["amount"], LOANS["apr"], LOANS["weeks"], LOANS["frequency"], method="declining")
+    rows = np.arange(len(LOANS))
+    last = s["n_payments"] - 1
+    assert (s["balance"][rows, last] == 0).all()
+    np.testing.assert_allclose(s["principal"].sum(axis=1), LOANS["amount"])
+    np.testing.assert_allclose(s["interest"].sum(axis=1), s["total_interest"])
+    np.testing.assert_allclose(s["payment"].sum(axis=1), s["total_repay"])
+    # level instalment
+    active = s["due_day"] >= 0
+    np.testing.assert_allclose(s["payment"][active], np.broadcast_to(s["payment_per"][:, None], active.shape)[active])
+
+
+def test_declining_balance_with_zero_apr():
+    s = build_schedules([300.0], [0.0], [12], ["Weekly"], method="declining")
+    np.testing.assert_allclose(s["payment"][0], 25.0)
+    assert s["total_interest"][0] == 0 and (s["interest"] == 0).all()
+    np.testing.assert_allclose(s["balance"][0], 300.0 - 25.0 * np.arange(1, 13))
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "M"])
+def test_ledger_projection_matches_per_loan_schedules(freq):
+    rng = np.random.default_rng(0)
+    n = 200
+    loans = pd.DataFrame(
+        {
+            "principal": rng.integers(2, 81, n) * 10.0,
+            "apr": rng.uniform(0, 35, n).round(2),
+            "weeks": rng.integers(2, 25, n),
+            "frequency": rng.choice(list(FREQUENCIES), n),
+            "start": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 120, n), unit="D"),
+            "method": rng.choice(["simple", "declining"], n),
+        }
+    )
+    ledger = LoanLedger(capacity=16)
+    ledger.add_many(loans["principal"], loans["apr"], loans["weeks"], loans["frequency"], loans["start"], loans["method"])
+
+    flows = []
+    for loan in loans.itertuples():
+        s = build_schedules(loan.principal, loan.apr, loan.weeks, loan.frequency, method=loan.method)
+        k = s["n_payments"][0]
+        due = loan.start + pd.to_timedelta(s["due_day"][0, :k], unit="D")
+        flows.append(pd.Series(s["payment"][0, :k], index=due))
+    flows = pd.concat(flows)
+    expected = flows.groupby(flows.index.to_period(freq)).sum()
+
+    projected = ledger.project(freq)
+    assert projected.sum() == pytest.approx(flows.sum())
+    pd.testing.assert_series_equal(projected[projected != 0], expected, check_names=False, check_freq=False)
+
+    window = ledger.project(freq, start="2025-03-01", end="2025-05-01")
+    in_window = flows[(flows.index >= "2025-03-01") & (flows.index < "2025-05-01")]
+    assert window.sum() == pytest.approx(in_window.sum())
@@ -0,0 +1,208 @@
+import itertools
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.rules import DEFAULT_RULES_PATH, RuleBook, get_plan
+
+
+@pytest.fixture
+def book(tmp_path):
+    path = tmp_path / "rules.json"
+    shutil.copy(DEFAULT_RULES_PATH, path)
+    return RuleBook(str(path), reload_interval=0)
+
+
+def rewrite(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.mark.parametrize(
+    "broken",
+    [
+        lambda text: text[: len(text) // 2],  # half-saved file
+        lambda text: text.replace('">="', '"=>"', 1),  # unknown operator
+        lambda text: text.replace('"rules"', '"ruels"', 1),  # missing key
+    ],
+)
+def test_bad_reload_keeps_last_good_plans(book, broken, caplog):
+    good = book.plan("transaction_score")
+    with open(book.path) as f:
+        text = f.read()
+    rewrite(book.path, broken(text))
+    assert book.plan("transaction_score") is good
+    assert "Could not reload" in caplog.text
+
+    specs = json.loads(text)
+    specs["transaction_score"]["base"] += 1
+    rewrite(book.path, json.dumps(specs))
+    reloaded = book.plan("transaction_score")
+    assert reloaded is not good and reloaded.base == good.base + 1
+
+
+def test_first_load_still_raises(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text("{")
+    with pytest.raises(ValueError):
+        RuleBook(str(path)).plan("transaction_score")
+
+
+# ---------- parity with the hard-coded rules the tables replaced ----------
+
+
+def old_transaction_score(f):
+    score = 50
+    if f["avg_inflow"] >= 800:
+        score += 15
+    elif f["avg_inflow"] >= 400:
+        score += 5
+    if f["income_volatility"] > 0.6:
+        score -= 10
+    elif f["income_volatility"] > 0.4:
+        score -= 5
+    if f["expense_ratio"] > 0.95:
+        score -= 12
+    elif f["expense_ratio"] > 0.8:
+        score -= 6
+    elif f["expense_ratio"] < 0.6:
+        score += 4
+    score -= min(24, 8 * f["overdraft_count"])
+    if f["remittance_count"] >= 3:
+        score += 6
+    if f["gig_months_active"] >= 3:
+        score += 8
+    if f["mobile_money_signal"]:
+        score += 4
+    score = max(0, min(100, score))
+    band = "Prime" if score >= 86 else "Green" if score >= 70 else "Amber" if score >= 50 else "Red"
+    return {"score": int(score), "band": band}
+
+
+def old_dashboard_score(p):
+    score = 650
+    if p["monthly_income"] < 800:
+        income, score = "Negative", score - 80
+    elif p["monthly_income"] < 1500:
+        income, score = "Slight negative", score - 40
+    elif p["monthly_income"] > 5000:
+        income, score = "Strong positive", score + 50
+    elif p["monthly_income"] > 3500:
+        income, score = "Positive", score + 30
+    else:
+        income = "Neutral"
+    score -= p["income_volatility"] * 0.6
+    vol = "Positive" if p["income_volatility"] <= 20 else "Moderate" if p["income_volatility"] <= 50 else "Negative"
+    if p["utilization"] < 10:
+        util, score = "Slight negative (under-used)", score - 10
+    elif 10 <= p["utilization"] <= 40:
+        util, score = "Positive", score + 20
+    elif p["utilization"] > 80:
+        util, score = "Negative (high utilization)", score - 40
+    else:
+        util = "Neutral"
+    missed = p["missed_payments"]
+    pay = "Positive (clean record)" if missed == 0 else "Negative" if missed <= 2 else "Strong negative"
+    score -= missed * 25
+    if p["country_risk"] == "Low":
+        crisk, score = "Positive", score + 20
+    elif p["country_risk"] == "Medium":
+        crisk = "Neutral"
+    else:
+        crisk, score = "Negative", score - 30
+    score += min(p["months_history"], 24) * 0.8
+    score += min(p["accounts_linked"], 5) * 4
+    months = p["months_history"]
+    depth = "Thin file (limited history)" if months < 6 else "Developing history" if months < 12 else "Good history depth"
+    if p["kyc_status"] == "Verified":
+        kyc, score = "Positive", score + 20
+    elif p["kyc_status"] == "In review":
+        kyc, score = "Mild positive", score + 5
+    else:
+        kyc = "Negative (unverified)"
+    score = int(np.clip(score, 300, 900))
+    band = "Low" if score >= 760 else "Medium" if score >= 620 else "High"
+    return {
+        "score": score, "band": band, "income": income, "volatility_impact": vol, "utilization": util,
+        "missed_payments_impact": pay, "country_risk": crisk, "depth_impact": depth, "kyc": kyc,
+    }
+
+
+def old_microloan_decision(ai_score, volatility):
+    final_score = ai_score - volatility * 0.4
+    decision = "Approved" if final_score >= 720 else "Needs manual review" if final_score >= 630 else "Declined"
+    return {"score": final_score, "band": decision}
+
+
+def old_microloan_apr(ai_score, volatility):
+    return {"score": max(5.9, 9.5 + (700 - ai_score) / 20 + volatility / 15)}
+
+
+def old_microloan_max_offer(final_score):
+    return {"score": int(np.clip(int((final_score - 300) / 600 * 600), 30, 600))}
+
+
+def edge_grid(edges: dict, n: int = None, seed: int = 0) -> pd.DataFrame:
+    """Every combination of the edge values, or n random draws from them."""
+    if n is None:
+        return pd.DataFrame(list(itertools.product(*edges.values())), columns=list(edges))
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({k: [v[i] for i in rng.integers(0, len(v), n)] for k, v in edges.items()})
+
+
+def assert_plan_matches(plan_name, grid: pd.DataFrame, expected) -> None:
+    plan = get_plan(plan_name)
+    batch = pd.DataFrame(plan.evaluate(grid))
+    for i, row in enumerate(grid.to_dict("records")):
+        one = plan.evaluate_one(**row)
+        assert one == batch.iloc[i].to_dict(), row
+        assert {k: one[k] for k in expected(row)} == expected(row), row
+
+
+TRANSACTION_EDGES = {
+    "avg_inflow": [0.0, 399.99, 400.0, 799.99, 800.0, 2500.0],
+    "income_volatility": [0.0, 0.4, 0.41, 0.6, 0.61, float("nan")],
+    "expense_ratio": [0.0, 0.59, 0.6, 0.8, 0.81, 0.95, 0.96],
+    "overdraft_count": [0, 1, 3, 4],
+    "remittance_count": [2, 3],
+    "gig_months_active": [2, 3],
+    "mobile_money_signal": [False, True],
+}
+
+DASHBOARD_EDGES = {
+    "monthly_income": [200, 799, 800, 1499, 1500, 3500, 3501, 5000, 5001, 8000],
+    "income_volatility": [0, 20, 21, 50, 51, 100],
+    "utilization": [0, 9, 10, 40, 41, 80, 81, 100],
+    "missed_payments": [0, 1, 2, 3, 10],
+    "country_risk": ["Low", "Medium", "High"],
+    "months_history": [0, 5, 6, 11, 12, 24, 60],
+    "accounts_linked": [0, 1, 5, 10],
+    "kyc_status": ["Not started", "In review", "Verified"],
+}
+
+
+@pytest.mark.parametrize("mobile_money", [False, True])
+def test_transaction_score_matches_removed_code(mobile_money):
+    grid = edge_grid({**TRANSACTION_EDGES, "mobile_money_signal": [mobile_money]})
+    assert_plan_matches("transaction_score", grid, old_transaction_score)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_dashboard_score_matches_removed_code(seed):
+    grid = edge_grid(DASHBOARD_EDGES, n=3_000, seed=seed)
+    assert_plan_matches("dashboard_score", grid, old_dashboard_score)
+
+
+@pytest.mark.parametrize("volatility", range(0, 101, 5))
+def test_microloan_plans_match_removed_code(volatility):
+    grid = pd.DataFrame({"ai_score": np.arange(300, 901), "volatility": volatility})
+    assert_plan_matches("microloan_decision", grid, lambda row: old_microloan_decision(**row))
+    assert_plan_matches("microloan_apr", grid, lambda row: old_microloan_apr(**row))
+    final = pd.DataFrame({"final_score": grid["ai_score"] - volatility * 0.4})
+    assert_plan_matches("microloan_max_offer", final, lambda row: old_microloan_max_offer(**row))
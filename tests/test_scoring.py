@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.scoring import (
+    FEATURE_COLUMNS, IncrementalFeatureState, compute_features, compute_features_batch, rule_based_score,
+    rule_based_score_batch,
+)
+
+CATEGORIES = [
+    "salary", "rent", "ecocash_gig", "wallet_spend", "remittance_in", "Upwork payout",
+    "groceries", "M-Pesa send", "transfer_international", "grab ride", None,
+]
+
+
+def random_transactions(n_users: int, seed: int) -> pd.DataFrame:
+    """Long-format transactions with fractional amounts, bad dates/amounts and outflow-only users."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for u in range(n_users):
+        outflow_only = rng.random() < 0.1
+        for _ in range(int(rng.integers(1, 40))):
+            day = pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(rng.integers(0, 200)))
+            amount = round(float(rng.random() * 10 ** rng.integers(0, 6)), int(rng.integers(0, 3)))
+            tx_type = "outflow" if outflow_only else rng.choice(["inflow", "outflow", "Inflow", "OUTFLOW", "other"])
+            rows.append(
+                {
+                    "user_id": f"u{u}",
+                    "date": day.strftime("%Y-%m-%d") if rng.random() > 0.03 else "garbage",
+                    "amount": amount if rng.random() > 0.03 else "x",
+                    "type": tx_type,
+                    "category": CATEGORIES[rng.integers(0, len(CATEGORIES))],
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def assert_same_features(expected: dict, got: dict, context=None) -> None:
+    for name in FEATURE_COLUMNS:
+        e, g = expected[name], got[name]
+        if isinstance(e, float) and np.isnan(e):
+            assert np.isnan(g), (context, name)
+        else:
+            assert e == g, (context, name, e, g)
+
+
+def assert_batch_matches_loop(df: pd.DataFrame) -> None:
+    batch = compute_features_batch(df)
+    for user, rows in df.groupby("user_id", sort=False):
+        expected = compute_features(rows.drop(columns="user_id").reset_index(drop=True))
+        assert_same_features(expected, batch.loc[user, FEATURE_COLUMNS].to_dict(), user)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_per_user_loop(seed):
+    assert_batch_matches_loop(random_transactions(400, seed))
+
+
+def test_batch_mean_rounds_like_single_user():
+    # groupby().mean() sums these in another order and rounds to 87.83
+    df = pd.DataFrame(
+        {
+            "user_id": "a",
+            "date": ["2025-01-05", "2025-02-05", "2025-03-05", "2025-04-05"],
+            "amount": [250.5, 0.7, 0.1, 100],
+            "type": "inflow",
+            "category": "salary",
+        }
+    )
+    assert compute_features_batch(df).loc["a", "avg_inflow"] == compute_features(df)["avg_inflow"] == 87.82
+
+
+def test_batch_handles_users_without_inflows():
+    df = pd.DataFrame(
+        {
+            "user_id": ["a", "a", "b"],
+            "date": ["2025-01-05", "garbage", "2025-02-01"],
+            "amount": [10.0, "x", 25.5],
+            "type": ["outflow", "outflow", "inflow"],
+            "category": ["rent", None, "salary"],
+        }
+    )
+    assert_batch_matches_loop(df)
+    assert compute_features_batch(df).loc["a", "avg_inflow"] == 0.0
+
+
+def test_incremental_state_parses_dates_like_compute_features():
+    df = pd.DataFrame(
+        {
+            "date": ["03/01/2025", "03/02/2025", "25/02/2025", "03/03/2025"],
+            "amount": [100, 500, 650, 575],
+            "type": "inflow",
+            "category": "upwork gig",
+        }
+    )
+    state = IncrementalFeatureState.from_transactions(df)
+    assert state.date_format == "%d/%m/%Y"
+    assert state.to_dict() == compute_features(df)
+
+    state.update("28/03/2025", 25, "inflow", "salary")
+    assert state.to_dict() == compute_features(
+        pd.concat([df, pd.DataFrame([{"date": "28/03/2025", "amount": 25, "type": "inflow", "category": "salary"}])])
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_batch_scores_match_rule_based_score(seed):
+    feats = compute_features_batch(random_transactions(400, seed))
+    batch = rule_based_score_batch(feats)
+    for user, row in feats.iterrows():
+        assert rule_based_score(row[FEATURE_COLUMNS].to_dict()) == (batch.at[user, "score"], batch.at[user, "band"])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_state_matches_compute_features(seed):
+    for user, rows in random_transactions(150, seed).groupby("user_id", sort=False):
+        rows = rows.drop(columns="user_id").reset_index(drop=True)
+        expected = compute_features(rows)
+        assert_same_features(expected, IncrementalFeatureState.from_transactions(rows).to_dict(), user)
+
+        # the same history streamed in two parts
+        state = IncrementalFeatureState.from_transactions(rows.iloc[: len(rows) // 2])
+        state.update_frame(rows.iloc[len(rows) // 2:])
+        assert_same_features(expected, state.to_dict(), user)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.scoring import compute_features_batch
+from utils.streaming import score_csv
+
+
+def transactions(users, rows_per_user: int = 8, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = len(users) * rows_per_user
+    return pd.DataFrame(
+        {
+            "user_id": np.repeat(users, rows_per_user),
+            "date": (pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D")).strftime("%Y-%m-%d"),
+            "amount": rng.integers(1, 5000, n) / 100,
+            "type": rng.choice(["inflow", "outflow"], n),
+            "category": rng.choice(["salary", "rent", "groceries"], n),
+        }
+    )
+
+
+def test_streamed_features_match_batch(tmp_path):
+    df = transactions(list(range(40)))
+    path = tmp_path / "tx.csv"
+    df.to_csv(path, index=False)
+    streamed = score_csv(str(path), chunksize=50, score=False)
+    pd.testing.assert_frame_equal(streamed, compute_features_batch(df), check_names=False)
+
+
+def test_user_reappearing_after_chunk_boundary_raises(tmp_path):
+    df = pd.concat([transactions(list(range(10))), transactions([0], seed=1)], ignore_index=True)
+    path = tmp_path / "tx.csv"
+    df.to_csv(path, index=False)
+    with pytest.raises(ValueError, match="reappears"):
+        score_csv(str(path), chunksize=50)
+
+
+def test_user_spanning_two_files_raises(tmp_path):
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    transactions([0, 1]).to_csv(first, index=False)
+    transactions([1, 2], seed=1).to_csv(second, index=False)
+    with pytest.raises(ValueError, match="reappears"):
+        score_csv([str(first), str(second)], chunksize=50)
+
+
+def test_rows_without_a_user_id_are_dropped(tmp_path):
+    df = transactions(list(range(6)))
+    df["user_id"] = df["user_id"].astype(float)
+    df.loc[[3, 4, 20, 21, 22], "user_id"] = np.nan  # adjacent and split missing ids
+    path = tmp_path / "tx.csv"
+    df.to_csv(path, index=False)
+    streamed = score_csv(str(path), chunksize=7, score=False)
+    pd.testing.assert_frame_equal(streamed, compute_features_batch(df), check_names=False)